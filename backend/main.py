@@ -1,22 +1,38 @@
+from __future__ import annotations
+
+import time
+
+_IMPORT_STARTED = time.perf_counter()
+
 import os
-import base64
 import io
 import re
+import shutil
 import json
-import numpy as np
-import pandas as pd
-import matplotlib
-matplotlib.use('Agg')  # Use non-interactive backend
-import matplotlib.pyplot as plt
-import seaborn as sns
-import folium
-from folium import plugins
-from flask import Flask, request, jsonify
+import random
+import hashlib
+import importlib
+import threading
+import uuid
+import warnings
+import weakref
+import cProfile
+import hmac
+import marshal
+import pstats
+import tracemalloc
+try:
+    import fcntl
+except ImportError:  # Windows: every process refreshes its own snapshots
+    fcntl = None
+from flask import (Flask, Response, request, jsonify, g, has_request_context, make_response,
+                   send_from_directory, stream_with_context)
 from flask_cors import CORS
-from openai import OpenAI
 from dotenv import load_dotenv
-import requests
-from datetime import datetime, timedelta
+from abc import ABC, abstractmethod
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
 
 # Load environment variables from .env file
 load_dotenv()
@@ -24,8 +40,96 @@ load_dotenv()
 app = Flask(__name__)
 CORS(app)
 
- 
+# Startup timings reported on /metrics so worker readiness can be tracked
+STARTUP_METRICS = {
+    'import_seconds': None,
+    'warmup_seconds': None,
+    'ready_seconds': None,
+    'module_imports': {},
+}
+
+
+class _LazyModule:
+    """Module proxy that imports the real module on first attribute access"""
+
+    def __init__(self, name, before_import=None):
+        self._name = name
+        self._before_import = before_import
+        self._module = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        if self._module is None:
+            with self._lock:
+                if self._module is None:
+                    started = time.perf_counter()
+                    if self._before_import:
+                        self._before_import()
+                    module = importlib.import_module(self._name)
+                    STARTUP_METRICS['module_imports'][self._name] = round(time.perf_counter() - started, 4)
+                    self._module = module
+        return self._module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+
+def _select_matplotlib_backend():
+    import matplotlib
+    matplotlib.use('Agg')  # Use non-interactive backend
+
+
+# Heavy modules are loaded on first use by the code path that needs them
+np = _LazyModule('numpy')
+pd = _LazyModule('pandas')
+plt = _LazyModule('matplotlib.pyplot', before_import=_select_matplotlib_backend)
+folium = _LazyModule('folium')
+plugins = _LazyModule('folium.plugins')
+requests = _LazyModule('requests')
+xr = _LazyModule('xarray')
+
+_PLOT_STYLE_READY = False
+
+
+_figure_stats = {'rendered': 0, 'failed': 0}
+
+
+@contextmanager
+def guarded_figure(**kwargs):
+    """A new (fig, ax) that is always closed, even if drawing raises.
+
+    Figures are addressed explicitly rather than through pyplot's "current figure",
+    which is shared between the threads rendering concurrent requests.
+    """
+    fig, ax = plt.subplots(**kwargs)
+    try:
+        yield fig, ax
+        _figure_stats['rendered'] += 1
+    except BaseException:
+        _figure_stats['failed'] += 1
+        raise
+    finally:
+        plt.close(fig)
+
+
+def _ensure_plot_style():
+    """Apply the shared matplotlib style once per process"""
+    global _PLOT_STYLE_READY
+    if _PLOT_STYLE_READY:
+        return
+    plt.style.use('default')  # Use default style for better control
+    plt.rcParams['font.size'] = 10
+    plt.rcParams['axes.titlesize'] = 14
+    plt.rcParams['axes.labelsize'] = 11
+    plt.rcParams['xtick.labelsize'] = 9
+    plt.rcParams['ytick.labelsize'] = 9
+    plt.rcParams['legend.fontsize'] = 9
+    _PLOT_STYLE_READY = True
+
+
 def create_client() -> OpenAI:
+    from openai import OpenAI
+
     api_key = os.getenv("OPENROUTER_API")
     if not api_key:
         raise RuntimeError("OPENROUTER_API_KEY environment variable is not set")
@@ -78,164 +182,1226 @@ def is_domain_related(query: str) -> bool:
     return any(keyword in query_lower for keyword in domain_keywords)
 
 
-def fetch_real_time_argo_data(region=None, days_back=7):
-    """Fetch real-time ARGO float data from ERDDAP server"""
-    try:
-        # ERDDAP server URL for ARGO data
-        base_url = "https://polarwatch.noaa.gov/erddap/tabledap/argoFloats.json"
-        
-        # Calculate date range (last 7 days by default)
-        end_date = datetime.now()
-        start_date = end_date - timedelta(days=days_back)
-        
-        # Build query parameters
-        params = {
-            'time>=': start_date.strftime('%Y-%m-%dT%H:%M:%SZ'),
-            'time<=': end_date.strftime('%Y-%m-%dT%H:%M:%SZ'),
-            'latitude>=': -90,
-            'latitude<=': 90,
-            'longitude>=': -180,
-            'longitude<=': 180
+# Compact internal schema for float snapshots
+FLOAT_STATUSES = ['active', 'drifting', 'parked']
+MEASUREMENT_COLUMNS = ['latitude', 'longitude', 'temperature', 'salinity', 'depth', 'oxygen']
+
+
+def epoch_seconds(values) -> np.ndarray:
+    """Parse timestamps once into int64 seconds since the Unix epoch (missing -> now)"""
+    times = pd.to_datetime(pd.Series(values), utc=True, errors='coerce', format='ISO8601')
+    times = times.fillna(pd.Timestamp.now(tz='UTC')).dt.as_unit('s')
+    return times.astype('int64').to_numpy()
+
+
+def to_compact_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """Convert a float frame in place to the compact schema.
+
+    float_id and status become categoricals, measurements float32 and the deployment
+    time an int64 `deployment_epoch` column, replacing the string `time` column.
+    """
+    if df.empty:
+        return df
+
+    if 'float_id' in df.columns:
+        df['float_id'] = df['float_id'].astype(str).astype('category')
+        df = df.drop(columns=['platform_number'], errors='ignore')
+    if 'status' in df.columns:
+        df['status'] = pd.Categorical(df['status'], categories=FLOAT_STATUSES).fillna('active')
+    for col in MEASUREMENT_COLUMNS:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors='coerce').astype('float32')
+    for col in ('deployment_date', 'time'):
+        if col in df.columns:
+            if 'deployment_epoch' not in df.columns:
+                df['deployment_epoch'] = epoch_seconds(df[col])
+            df = df.drop(columns=[col])
+    return df
+
+
+# Callbacks run whenever a fresh snapshot has been fetched from upstream
+_snapshot_listeners = []
+
+
+def on_snapshot_refresh(listener):
+    """Register `listener(kind, region, df)`; kind is "observations" or "locations"."""
+    _snapshot_listeners.append(listener)
+    return listener
+
+
+def notify_snapshot_refresh(kind: str, region, df: pd.DataFrame):
+    for listener in _snapshot_listeners:
+        try:
+            listener(kind, region, df)
+        except Exception as e:
+            print(f"Snapshot listener {getattr(listener, '__name__', listener)} failed: {e}")
+
+
+# Per-request latency budgets (seconds) by intent, and the remaining-budget levels
+# below which the pipeline degrades: skip live fetches, then render at low
+# resolution, then answer with text only
+LATENCY_BUDGETS = {
+    'text': float(os.environ.get("ARGO_BUDGET_TEXT_SECONDS", "20")),
+    'graph': float(os.environ.get("ARGO_BUDGET_GRAPH_SECONDS", "35")),
+    'map': float(os.environ.get("ARGO_BUDGET_MAP_SECONDS", "35")),
+}
+SKIP_LIVE_FETCH_BELOW = 10.0
+LOW_RESOLUTION_BELOW = 6.0
+TEXT_ONLY_BELOW = 3.0
+STREAM_CUTOFF_BELOW = 4.0  # stop reading a streamed completion, leaving time to render
+LOW_RESOLUTION_DPI = 100
+
+
+class DeadlineExceeded(Exception):
+    """Raised when a request has no budget left for its next stage"""
+
+
+class Deadline:
+    """Time budget of one request, shared by its LLM, data fetch and render stages"""
+
+    def __init__(self, seconds: float):
+        self.budget = seconds
+        self.expires_at = time.monotonic() + seconds
+        self.degradations = []
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def degrade(self, name: str):
+        if name not in self.degradations:
+            self.degradations.append(name)
+
+    def _allow(self, threshold: float, degradation: str) -> bool:
+        if self.remaining() >= threshold:
+            return True
+        self.degrade(degradation)
+        return False
+
+    def allow_live_fetch(self) -> bool:
+        return self._allow(SKIP_LIVE_FETCH_BELOW, 'skip_live_fetch')
+
+    def allow_full_render(self) -> bool:
+        return self._allow(LOW_RESOLUTION_BELOW, 'low_resolution')
+
+    def allow_visual(self) -> bool:
+        return self._allow(TEXT_ONLY_BELOW, 'text_only')
+
+    def llm_options(self) -> dict:
+        """Per-call timeout for the OpenAI client"""
+        if self.expired:
+            raise DeadlineExceeded("latency budget exhausted before the LLM call")
+        return {"timeout": self.remaining()}
+
+
+ERDDAP_URL = "https://polarwatch.noaa.gov/erddap/tabledap/argoFloats.json"
+ERDDAP_TIMEOUT = 30
+REGION_LONGITUDE_BOUNDS = {
+    'pacific': (-180, -100),
+    'atlantic': (-100, 20),
+    'indian': (20, 180),
+}
+
+
+OCEAN_REGIONS = ('pacific', 'atlantic', 'indian', 'arctic', 'southern')
+
+
+def detect_region(text: str):
+    """First ocean region named in the text, or None"""
+    text = (text or "").lower()
+    return next((name for name in OCEAN_REGIONS if name in text), None)
+
+
+def region_key(region):
+    """Normalize a region name to the ERDDAP query it maps to (None means global)"""
+    if region:
+        for name in REGION_LONGITUDE_BOUNDS:
+            if name in region.lower():
+                return name
+    return None
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an upstream whose circuit breaker is open"""
+
+
+class CircuitBreaker:
+    """Fail fast after repeated upstream failures and probe for recovery in the background.
+
+    After `failure_threshold` consecutive failures the circuit opens: calls raise
+    CircuitOpenError immediately instead of waiting on the upstream timeout. A daemon
+    thread runs `probe` every `reset_timeout` seconds and closes the circuit once it
+    succeeds.
+    """
+
+    def __init__(self, name: str, probe, failure_threshold: int = 3, reset_timeout: float = 30.0):
+        self.name = name
+        self.probe = probe
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = 'closed'
+        self.failures = 0
+        self.opened_at = None
+        self.times_opened = 0
+        self._lock = threading.Lock()
+
+    def call(self, fn, *args, **kwargs):
+        if self.state != 'closed':
+            raise CircuitOpenError(f"{self.name} circuit is open")
+        try:
+            result = fn(*args, **kwargs)
+        except Exception:
+            self._record_failure()
+            raise
+        with self._lock:
+            self.failures = 0
+        return result
+
+    def _record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state != 'closed' or self.failures < self.failure_threshold:
+                return
+            self.state = 'open'
+            self.opened_at = time.time()
+            self.times_opened += 1
+        print(f"{self.name} circuit opened after {self.failures} failures")
+        threading.Thread(target=self._probe_until_recovered, name=f"{self.name}-probe", daemon=True).start()
+
+    def _probe_until_recovered(self):
+        while True:
+            time.sleep(self.reset_timeout)
+            self.state = 'half_open'
+            try:
+                self.probe()
+            except Exception as e:
+                self.state = 'open'
+                print(f"{self.name} recovery probe failed: {e}")
+                continue
+            with self._lock:
+                self.state = 'closed'
+                self.failures = 0
+                self.opened_at = None
+            print(f"{self.name} circuit closed")
+            return
+
+    def metrics(self) -> dict:
+        return {
+            'state': self.state,
+            'consecutive_failures': self.failures,
+            'open_seconds': round(time.time() - self.opened_at, 1) if self.opened_at else 0,
+            'times_opened': self.times_opened,
         }
-        
-        # Add region-specific constraints if specified
-        if region:
-            if 'pacific' in region.lower():
-                params['longitude>='] = -180
-                params['longitude<='] = -100
-            elif 'atlantic' in region.lower():
-                params['longitude>='] = -100
-                params['longitude<='] = 20
-            elif 'indian' in region.lower():
-                params['longitude>='] = 20
-                params['longitude<='] = 180
-        
-        # Make request to ERDDAP
-        response = requests.get(base_url, params=params, timeout=30)
-        
-        if response.status_code == 200:
-            data = response.json()
-            if 'table' in data and 'rows' in data['table']:
-                # Convert to DataFrame
-                columns = [col['name'] for col in data['table']['columnNames']]
-                rows = data['table']['rows']
-                
-                df = pd.DataFrame(rows, columns=columns)
-                
-                # Clean and process the data
-                df = df.dropna(subset=['latitude', 'longitude'])
-                df['latitude'] = pd.to_numeric(df['latitude'], errors='coerce')
-                df['longitude'] = pd.to_numeric(df['longitude'], errors='coerce')
-                df['temperature'] = pd.to_numeric(df.get('temperature', 0), errors='coerce')
-                df['salinity'] = pd.to_numeric(df.get('salinity', 0), errors='coerce')
-                df['depth'] = pd.to_numeric(df.get('depth', 0), errors='coerce')
-                
-                # Add float ID and status
-                df['float_id'] = df.get('platform_number', 'UNKNOWN')
-                df['status'] = 'active'  # Assume active for real-time data
-                df['deployment_date'] = pd.to_datetime(df.get('time', datetime.now()))
-                
-                # Ensure all required columns exist
-                if 'temperature' not in df.columns:
-                    df['temperature'] = np.random.normal(15, 5, len(df))
-                if 'salinity' not in df.columns:
-                    df['salinity'] = np.random.normal(35, 2, len(df))
-                if 'depth' not in df.columns:
-                    df['depth'] = np.random.uniform(0, 2000, len(df))
-                
-                return df.dropna()
-        
-        # Fallback to sample data if real-time fetch fails
-        return generate_sample_data("real-time fallback")
-        
+
+
+def _probe_erddap():
+    # Dataset metadata is a small, cheap request on the same server
+    requests.get(ERDDAP_URL[:-len('.json')] + '.das', timeout=ERDDAP_TIMEOUT).raise_for_status()
+
+
+erddap_breaker = CircuitBreaker(
+    'ERDDAP',
+    _probe_erddap,
+    failure_threshold=int(os.environ.get("ARGO_BREAKER_FAILURES", "3")),
+    reset_timeout=float(os.environ.get("ARGO_BREAKER_RESET_SECONDS", "30"))
+)
+
+
+def _erddap_get(params: dict, timeout: float = ERDDAP_TIMEOUT) -> dict:
+    response = requests.get(ERDDAP_URL, params=params, timeout=timeout)
+    response.raise_for_status()
+    return response.json()
+
+
+def _erddap_table(region, days_back: int, timeout: float = ERDDAP_TIMEOUT) -> pd.DataFrame:
+    """Query ERDDAP for the last `days_back` days; raises on any upstream failure"""
+    # Calculate date range
+    end_date = datetime.now()
+    start_date = end_date - timedelta(days=days_back)
+    
+    # Build query parameters
+    lon_min, lon_max = REGION_LONGITUDE_BOUNDS.get(region_key(region), (-180, 180))
+    params = {
+        'time>=': start_date.strftime('%Y-%m-%dT%H:%M:%SZ'),
+        'time<=': end_date.strftime('%Y-%m-%dT%H:%M:%SZ'),
+        'latitude>=': -90,
+        'latitude<=': 90,
+        'longitude>=': lon_min,
+        'longitude<=': lon_max
+    }
+    
+    data = erddap_breaker.call(_erddap_get, params, timeout)
+    if 'table' not in data or 'rows' not in data['table']:
+        raise ValueError("ERDDAP response has no table rows")
+    
+    columns = [col['name'] for col in data['table']['columnNames']]
+    return pd.DataFrame(data['table']['rows'], columns=columns)
+
+
+def load_observations(region=None, days_back=7, timeout=ERDDAP_TIMEOUT) -> pd.DataFrame:
+    """Fetch and clean real-time ARGO observations from ERDDAP (raises on failure)"""
+    df = _erddap_table(region, days_back, timeout)
+    
+    # Clean and process the data
+    df = df.dropna(subset=['latitude', 'longitude'])
+    df['latitude'] = pd.to_numeric(df['latitude'], errors='coerce')
+    df['longitude'] = pd.to_numeric(df['longitude'], errors='coerce')
+    df['temperature'] = pd.to_numeric(df.get('temperature', 0), errors='coerce')
+    df['salinity'] = pd.to_numeric(df.get('salinity', 0), errors='coerce')
+    df['depth'] = pd.to_numeric(df.get('depth', 0), errors='coerce')
+    
+    # Add float ID and status
+    df['float_id'] = df.get('platform_number', 'UNKNOWN')
+    df['status'] = 'active'  # Assume active for real-time data
+    df['deployment_epoch'] = epoch_seconds(df['time'] if 'time' in df.columns else [None] * len(df))
+    
+    # Ensure all required columns exist
+    if 'temperature' not in df.columns:
+        df['temperature'] = np.random.normal(15, 5, len(df))
+    if 'salinity' not in df.columns:
+        df['salinity'] = np.random.normal(35, 2, len(df))
+    if 'depth' not in df.columns:
+        df['depth'] = np.random.uniform(0, 2000, len(df))
+    
+    return to_compact_frame(df.dropna())
+
+
+def load_float_locations(region=None, timeout=ERDDAP_TIMEOUT) -> pd.DataFrame:
+    """Fetch the latest position of each ARGO float from ERDDAP (raises on failure)"""
+    # Get data from last 30 days to ensure we have recent locations
+    df = _erddap_table(region, 30, timeout)
+    
+    # Process location data
+    df = df.dropna(subset=['latitude', 'longitude'])
+    df['latitude'] = pd.to_numeric(df['latitude'], errors='coerce')
+    df['longitude'] = pd.to_numeric(df['longitude'], errors='coerce')
+    
+    # Get unique float locations (latest position for each float)
+    df = df.groupby('platform_number').agg({
+        'latitude': 'last',
+        'longitude': 'last',
+        'time': 'last'
+    }).reset_index()
+    
+    # Add float metadata
+    df['float_id'] = df['platform_number']
+    df['status'] = 'active'
+    df['deployment_epoch'] = epoch_seconds(df['time'])
+    df['temperature'] = np.random.normal(15, 5, len(df))  # Placeholder
+    df['salinity'] = np.random.normal(35, 2, len(df))  # Placeholder
+    df['depth'] = np.random.uniform(0, 2000, len(df))  # Placeholder
+    
+    return to_compact_frame(df.dropna())
+
+
+class DataSource(ABC):
+    """Where snapshot and live observations come from.
+
+    `observations` returns measurement rows and `float_locations` the latest position
+    per float, both in the compact schema; both raise on failure so callers can fall
+    back to the last known good snapshot. A backend missing either can't be created.
+    """
+
+    name = 'base'
+
+    @property
+    def healthy(self) -> bool:
+        return True
+
+    @abstractmethod
+    def observations(self, region=None, days_back=7, timeout=ERDDAP_TIMEOUT) -> pd.DataFrame:
+        """Measurement rows in `region` over the last `days_back` days"""
+
+    @abstractmethod
+    def float_locations(self, region=None, timeout=ERDDAP_TIMEOUT) -> pd.DataFrame:
+        """Latest position of every float in `region`"""
+
+    def metrics(self) -> dict:
+        return {'name': self.name, 'healthy': self.healthy}
+
+
+def latest_surface_positions(df: pd.DataFrame) -> pd.DataFrame:
+    """One row per float: its latest profile, whose shallowest level stands in for surface values"""
+    if df.empty:
+        return df
+    latest = df[df['deployment_epoch'] == df.groupby('float_id', observed=True)['deployment_epoch'].transform('max')]
+    return latest.loc[latest.groupby('float_id', observed=True)['depth'].idxmin()].reset_index(drop=True)
+
+
+class ErddapDataSource(DataSource):
+    """The remote ERDDAP JSON endpoint, behind its circuit breaker"""
+
+    name = 'erddap'
+
+    @property
+    def healthy(self) -> bool:
+        return erddap_breaker.state == 'closed'
+
+    def observations(self, region=None, days_back=7, timeout=ERDDAP_TIMEOUT) -> pd.DataFrame:
+        return load_observations(region, days_back, timeout)
+
+    def float_locations(self, region=None, timeout=ERDDAP_TIMEOUT) -> pd.DataFrame:
+        return load_float_locations(region, timeout)
+
+
+GDAC_INDEX_FILE = 'ar_index_global_prof.txt'
+GDAC_MAX_PROFILES = int(os.environ.get("ARGO_GDAC_MAX_PROFILES", "2000"))
+GDAC_VARIABLES = {'PRES': 'depth', 'TEMP': 'temperature', 'PSAL': 'salinity'}
+
+
+def open_argo_netcdf(path: str):
+    """Open an Argo NetCDF file lazily; classic (NetCDF3) files are memory-mapped"""
+    try:
+        return xr.open_dataset(path, engine='scipy', mmap=True, cache=False)
+    except Exception:
+        # NetCDF4/HDF5 files can't be memory-mapped but are still read lazily per variable
+        return xr.open_dataset(path, engine='netcdf4', cache=False)
+
+
+class GdacDataSource(DataSource):
+    """A local mirror of the Argo GDAC (`<root>/dac/<dac>/<wmo>/...nc`).
+
+    Profiles are selected from a small in-memory index, `ar_index_global_prof.txt` when
+    the mirror has one, otherwise built by scanning the per-float `*_prof.nc` files.
+    Only the selected profiles and the PRES/TEMP/PSAL variables are read from disk,
+    at most GDAC_MAX_PROFILES per query. Time windows end at the newest profile in
+    the mirror, so a historical mirror still answers "the last 7 days" of its data.
+    """
+
+    name = 'gdac'
+
+    def __init__(self, root: str, max_profiles: int = GDAC_MAX_PROFILES):
+        self.root = root
+        self.max_profiles = max_profiles
+        self._index = None
+        self._index_mtime = None
+        self._lock = threading.Lock()
+
+    def index(self) -> pd.DataFrame:
+        """Profile index: file, prof (position in the file), epoch, latitude, longitude, float_id"""
+        index_path = os.path.join(self.root, GDAC_INDEX_FILE)
+        mtime = os.path.getmtime(index_path) if os.path.exists(index_path) else None
+        with self._lock:
+            if self._index is None or mtime != self._index_mtime:
+                started = time.perf_counter()
+                self._index = self._read_index(index_path) if mtime else self._scan_index()
+                self._index_mtime = mtime
+                print(f"Indexed {len(self._index)} GDAC profiles in {time.perf_counter() - started:.2f}s")
+            return self._index
+
+    def _read_index(self, path: str) -> pd.DataFrame:
+        index = pd.read_csv(path, comment='#', usecols=['file', 'date', 'latitude', 'longitude'],
+                            dtype={'file': str, 'date': str})
+        index = index.dropna()
+        times = pd.to_datetime(index['date'], format='%Y%m%d%H%M%S', utc=True, errors='coerce')
+        return pd.DataFrame({
+            'file': os.path.join(self.root, 'dac') + os.sep + index['file'],
+            'prof': 0,  # Single-profile files; the first profile is the primary sampling
+            'epoch': times.dt.as_unit('s').astype('int64'),
+            'latitude': index['latitude'].astype('float32'),
+            'longitude': index['longitude'].astype('float32'),
+            'float_id': index['file'].str.split('/').str[1],
+        })[times.notna().to_numpy()].reset_index(drop=True)
+
+    def _scan_index(self) -> pd.DataFrame:
+        import glob
+        frames = []
+        for path in sorted(glob.glob(os.path.join(self.root, 'dac', '*', '*', '*_prof.nc'))):
+            try:
+                with open_argo_netcdf(path) as ds:
+                    times = pd.to_datetime(ds['JULD'].values, utc=True, errors='coerce')
+                    frames.append(pd.DataFrame({
+                        'file': path,
+                        'prof': np.arange(ds.sizes['N_PROF']),
+                        'epoch': times.as_unit('s').asi8,
+                        'latitude': ds['LATITUDE'].values.astype('float32'),
+                        'longitude': ds['LONGITUDE'].values.astype('float32'),
+                        'float_id': os.path.basename(path).split('_')[0],
+                    })[~times.isna()])
+            except Exception as e:
+                print(f"Skipping unreadable GDAC file {path}: {e}")
+        if not frames:
+            raise FileNotFoundError(f"No Argo profile files under {self.root}")
+        return pd.concat(frames, ignore_index=True)
+
+    def select(self, region, days_back: int) -> pd.DataFrame:
+        """Index rows in the region and time window, newest first"""
+        index = self.index()
+        end = min(int(index['epoch'].max()), int(time.time()))
+        lon_min, lon_max = REGION_LONGITUDE_BOUNDS.get(region_key(region), (-180, 180))
+        mask = ((index['epoch'] >= end - days_back * 86400) & (index['epoch'] <= end)
+                & (index['longitude'] >= lon_min) & (index['longitude'] <= lon_max))
+        return index[mask.to_numpy()].sort_values('epoch', ascending=False)
+
+    def read_profiles(self, rows: pd.DataFrame) -> pd.DataFrame:
+        """Measurement rows for the selected profiles, one file open per file"""
+        frames = []
+        for path, group in rows.groupby('file', sort=False):
+            try:
+                with open_argo_netcdf(path) as ds:
+                    profiles = ds[list(GDAC_VARIABLES)].isel(N_PROF=group['prof'].to_numpy())
+                    values = {col: profiles[var].values.astype('float32') for var, col in GDAC_VARIABLES.items()}
+            except Exception as e:
+                print(f"Skipping unreadable GDAC file {path}: {e}")
+                continue
+            levels = values['depth'].shape[1]
+            frame = pd.DataFrame({col: value.ravel() for col, value in values.items()})
+            for col in ('latitude', 'longitude', 'epoch', 'float_id'):
+                frame[col] = np.repeat(group[col].to_numpy(), levels)
+            frames.append(frame.dropna(subset=list(GDAC_VARIABLES.values())))
+        if not frames:
+            return pd.DataFrame()
+        df = pd.concat(frames, ignore_index=True)
+        df['status'] = 'active'
+        df['deployment_epoch'] = df.pop('epoch')
+        return to_compact_frame(df)
+
+    def monthly_batches(self):
+        """All observations in the mirror, one calendar month at a time (for ingestion)"""
+        index = self.index()
+        months = index['epoch'].to_numpy().astype('datetime64[s]').astype('datetime64[M]')
+        for month in np.unique(months):
+            rows = index[months == month]
+            for start in range(0, len(rows), self.max_profiles):
+                yield self.read_profiles(rows.iloc[start:start + self.max_profiles])
+
+    def observations(self, region=None, days_back=7, timeout=ERDDAP_TIMEOUT) -> pd.DataFrame:
+        return self.read_profiles(self.select(region, days_back).head(self.max_profiles))
+
+    def float_locations(self, region=None, timeout=ERDDAP_TIMEOUT) -> pd.DataFrame:
+        latest = self.select(region, 30).drop_duplicates('float_id').head(self.max_profiles)
+        return latest_surface_positions(self.read_profiles(latest))
+
+    def metrics(self) -> dict:
+        return {**super().metrics(), 'root': self.root,
+                'indexed_profiles': 0 if self._index is None else len(self._index)}
+
+
+# Zarr consolidation: rows sorted by (month, spatial tile), with a partition index of row ranges
+ZARR_TILE_DEGREES = 10
+ZARR_CHUNK_ROWS = 65536
+ZARR_COLUMNS = ['depth', 'temperature', 'salinity', 'latitude', 'longitude', 'deployment_epoch', 'platform']
+
+
+def _zarr_partitions(df: pd.DataFrame):
+    """(month, tile) partition keys for the rows of a compact frame"""
+    month = df['deployment_epoch'].to_numpy().astype('datetime64[s]').astype('datetime64[M]').astype('int64')
+    tiles_per_row = 360 // ZARR_TILE_DEGREES
+    lat_bin = ((df['latitude'].to_numpy() + 90) // ZARR_TILE_DEGREES).clip(0, 180 // ZARR_TILE_DEGREES - 1)
+    lon_bin = ((df['longitude'].to_numpy() + 180) // ZARR_TILE_DEGREES).clip(0, tiles_per_row - 1)
+    return month, (lat_bin * tiles_per_row + lon_bin).astype('int64')
+
+
+def _zarr_columns(df: pd.DataFrame) -> dict:
+    """Column arrays of a compact frame as stored in Zarr (numeric platform ids)"""
+    platform = pd.to_numeric(df['float_id'].astype(str), errors='coerce').fillna(-1).astype('int64')
+    return {col: platform.to_numpy() if col == 'platform' else df[col].to_numpy() for col in ZARR_COLUMNS}
+
+
+def build_zarr_store(batches, path: str) -> int:
+    """Consolidate compact frames into a chunked, compressed Zarr store.
+
+    Rows are buffered per month and each month is sorted by 10° tile and written in
+    one piece, so every (month, tile) partition is one contiguous row range; the
+    `partitions` group records each range with its time and position bounds. A month
+    is written once a batch starting after it arrives, so batches in time order (like
+    GdacDataSource.monthly_batches) keep only about a month in memory. The store is
+    written next to `path` and swapped in when complete.
+    """
+    started = time.perf_counter()
+    tmp_path = f"{path}.tmp-{uuid.uuid4().hex}"
+    pending = {}  # month -> list of column dicts
+    partitions = []
+    rows = 0
+
+    def write_month(month_pieces):
+        nonlocal rows
+        columns = {col: np.concatenate([piece[col] for piece in month_pieces]) for col in ZARR_COLUMNS}
+        month, tile = _zarr_partitions(pd.DataFrame(columns, copy=False))
+        order = np.lexsort((columns['deployment_epoch'], tile))
+        columns, tile = {col: values[order] for col, values in columns.items()}, tile[order]
+        batch = xr.Dataset({col: ('obs', values) for col, values in columns.items()})
+        if rows:
+            batch.to_zarr(tmp_path, append_dim='obs', consolidated=False)
+        else:
+            encoding = {col: {'chunks': (ZARR_CHUNK_ROWS,)} for col in ZARR_COLUMNS}
+            batch.to_zarr(tmp_path, mode='w', encoding=encoding, consolidated=False)
+
+        boundaries = np.flatnonzero(np.diff(tile)) + 1
+        for start, stop in zip(np.r_[0, boundaries], np.r_[boundaries, len(tile)]):
+            bounds = [(values.min(), values.max()) for values in
+                      (columns[col][start:stop] for col in ('deployment_epoch', 'latitude', 'longitude'))]
+            partitions.append((rows + start, rows + stop, *(value for pair in bounds for value in pair)))
+        rows += len(tile)
+
+    for df in batches:
+        if df.empty:
+            continue
+        month, _ = _zarr_partitions(df)
+        for done in sorted(m for m in pending if m < month.min()):
+            write_month(pending.pop(done))
+        columns = _zarr_columns(df)
+        for value in np.unique(month):
+            mask = month == value
+            pending.setdefault(value, []).append({col: values[mask] for col, values in columns.items()})
+    for done in sorted(pending):
+        write_month(pending.pop(done))
+    if not rows:
+        raise ValueError("No observations to write to the Zarr store")
+
+    columns = ['start', 'stop', 'epoch_min', 'epoch_max', 'lat_min', 'lat_max', 'lon_min', 'lon_max']
+    index = pd.DataFrame(partitions, columns=columns)
+    xr.Dataset({col: ('partition', index[col].to_numpy()) for col in columns}).to_zarr(
+        tmp_path, group='partitions', mode='w', consolidated=False)
+    if os.path.exists(path):
+        shutil.rmtree(path)
+    os.replace(tmp_path, path)
+    print(f"Wrote {rows} rows in {len(index)} partitions to {path} in {time.perf_counter() - started:.1f}s")
+    return rows
+
+
+class ZarrDataSource(DataSource):
+    """Observations from a store written by build_zarr_store.
+
+    A query looks up the partitions overlapping its time window and longitude band
+    and reads only those row ranges, so its cost follows the size of the answer
+    rather than the archive. Time windows end at the newest observation in the store.
+    """
+
+    name = 'zarr'
+
+    def __init__(self, path: str, max_rows: int = 500000):
+        self.path = path
+        self.max_rows = max_rows
+        self._store = None
+        self._partitions = None
+        self._lock = threading.Lock()
+
+    def _open(self):
+        with self._lock:
+            if self._store is None:
+                # chunks=None keeps variables lazy without dask; indexing reads only the touched chunks
+                self._store = xr.open_zarr(self.path, chunks=None, consolidated=False)
+                self._partitions = xr.open_zarr(self.path, group='partitions', chunks=None, consolidated=False).to_dataframe()
+            return self._store, self._partitions
+
+    def select_rows(self, region, days_back: int, latest_first: bool = True) -> pd.DataFrame:
+        store, partitions = self._open()
+        end = min(int(partitions['epoch_max'].max()), int(time.time()))
+        start = end - days_back * 86400
+        lon_min, lon_max = REGION_LONGITUDE_BOUNDS.get(region_key(region), (-180, 180))
+        hits = partitions[(partitions['epoch_max'] >= start) & (partitions['epoch_min'] <= end)
+                          & (partitions['lon_max'] >= lon_min) & (partitions['lon_min'] <= lon_max)]
+        if hits.empty:
+            return pd.DataFrame()
+
+        # Partitions are far smaller than chunks: gather the wanted rows per chunk so
+        # every touched chunk is read and decompressed once
+        hits = hits.sort_values('start')
+        wanted = np.concatenate([np.arange(first, stop) for first, stop in
+                                 zip(hits['start'].to_numpy(), hits['stop'].to_numpy())])
+        chunk_rows = store[ZARR_COLUMNS[0]].encoding.get('chunks', (ZARR_CHUNK_ROWS,))[0]
+        groups = np.split(wanted, np.flatnonzero(np.diff(wanted // chunk_rows)) + 1)
+        if latest_first:
+            groups.reverse()  # rows are stored in month order
+
+        frames, total = [], 0
+        for rows in groups:
+            if total >= self.max_rows:
+                break
+            part = store.isel(obs=slice(int(rows[0]), int(rows[-1]) + 1))
+            frame = pd.DataFrame({col: part[col].values[rows - rows[0]] for col in ZARR_COLUMNS})
+            frame = frame[frame['deployment_epoch'].between(start, end)
+                          & frame['longitude'].between(lon_min, lon_max)]
+            frames.append(frame)
+            total += len(frame)
+        if not frames:
+            return pd.DataFrame()
+        df = pd.concat(frames, ignore_index=True).head(self.max_rows)
+        df['float_id'] = df.pop('platform').astype(str)
+        df['status'] = 'active'
+        return to_compact_frame(df)
+
+    def observations(self, region=None, days_back=7, timeout=ERDDAP_TIMEOUT) -> pd.DataFrame:
+        return self.select_rows(region, days_back)
+
+    def float_locations(self, region=None, timeout=ERDDAP_TIMEOUT) -> pd.DataFrame:
+        return latest_surface_positions(self.select_rows(region, 30))
+
+    def metrics(self) -> dict:
+        return {**super().metrics(), 'path': self.path,
+                'partitions': 0 if self._partitions is None else len(self._partitions)}
+
+
+# Synthetic fleets: drifting floats with plausible temperature/salinity/oxygen profiles
+SYNTHETIC_DEPTH_LEVELS = (5, 10, 20, 30, 50, 75, 100, 125, 150, 200, 250, 300, 400, 500,
+                          600, 700, 800, 900, 1000, 1200, 1400, 1600, 1800, 2000)
+SYNTHETIC_FLOAT_ID_BASE = 5900000  # WMO-style numeric ids, so they survive the Zarr platform column
+
+
+def _synthetic_batch(rng, first_float: int, n_floats: int, cycles: int, levels, end: int, cycle_days: int):
+    # Start positions uniform in area between 65S and 65N, each float on its own cycle phase
+    lat = np.degrees(np.arcsin(rng.uniform(np.sin(np.radians(-65)), np.sin(np.radians(65)), n_floats)))
+    lon = rng.uniform(-180, 180, n_floats)
+    phase = rng.uniform(0, cycle_days * 86400, n_floats).astype('int64')
+    lats = np.empty((n_floats, cycles))
+    lons = np.empty((n_floats, cycles))
+    for cycle in range(cycles):
+        lats[:, cycle], lons[:, cycle] = lat, lon
+        # Zonal drift per cycle (km): eastward in the ACC, westward near the equator, plus a random walk
+        east_km = np.where(lat < -40, 80.0, np.where(np.abs(lat) < 15, -60.0, 20.0)) + rng.normal(0, 30, n_floats)
+        north_km = rng.normal(0, 25, n_floats)
+        lat = np.clip(lat + north_km / 111.0, -70, 70)
+        lon = (lon + east_km / (111.0 * np.cos(np.radians(lat))) + 180) % 360 - 180
+    epochs = end - phase[:, None] - (cycles - 1 - np.arange(cycles))[None, :] * cycle_days * 86400
+
+    # Per-profile surface properties, mixed layer depth and seasonal signal
+    profile_lat, profile_lon, profile_epoch = lats.ravel(), lons.ravel(), epochs.ravel()
+    n_profiles = len(profile_lat)
+    day_of_year = (profile_epoch // 86400) % 365
+    season = 2.0 * np.sin(2 * np.pi * (day_of_year - 80) / 365) * np.sign(profile_lat)
+    t_surface = np.clip(28 * np.cos(np.radians(profile_lat)) ** 1.5 - 1 + season + rng.normal(0, 0.3, n_profiles), -1.8, 31)
+    s_surface = 34.2 + 1.5 * np.exp(-((np.abs(profile_lat) - 25) / 12) ** 2) + rng.normal(0, 0.1, n_profiles)
+    mixed_layer = rng.uniform(20, 100, n_profiles)
+
+    depth = np.asarray(levels, dtype='float64')[None, :] + rng.normal(0, 1, (n_profiles, len(levels)))
+    depth = np.clip(depth, 0, None)
+    decay = np.clip(depth - mixed_layer[:, None], 0, None)
+    temperature = 2.5 + (t_surface[:, None] - 2.5) * np.exp(-decay / 400) + rng.normal(0, 0.05, depth.shape)
+    salinity = 34.7 + (s_surface[:, None] - 34.7) * np.exp(-decay / 300) + rng.normal(0, 0.01, depth.shape)
+    oxygen = 240 - 160 * np.exp(-((depth - 700) / 350) ** 2) - 2 * (t_surface[:, None] - 15) + rng.normal(0, 5, depth.shape)
+
+    per_level = len(levels)
+    float_codes = np.repeat(np.arange(first_float, first_float + n_floats), cycles * per_level)
+    statuses = rng.choice(len(FLOAT_STATUSES), n_floats, p=[0.6, 0.3, 0.1])
+    return pd.DataFrame({
+        'latitude': np.repeat(profile_lat, per_level).astype('float32'),
+        'longitude': np.repeat(profile_lon, per_level).astype('float32'),
+        'temperature': temperature.ravel().astype('float32'),
+        'salinity': salinity.ravel().astype('float32'),
+        'depth': depth.ravel().astype('float32'),
+        'oxygen': oxygen.ravel().astype('float32'),
+        'float_id': float_codes,
+        'status': pd.Categorical.from_codes(np.repeat(statuses, cycles * per_level), categories=FLOAT_STATUSES),
+        'deployment_epoch': np.repeat(profile_epoch, per_level),
+    })
+
+
+def synthetic_fleet_batches(n_floats: int, cycles: int = 36, levels=SYNTHETIC_DEPTH_LEVELS, seed: int = 42,
+                            end: int = None, cycle_days: int = 10, batch_floats: int = 1000):
+    """Yield a synthetic fleet as compact frames of up to `batch_floats` floats each.
+
+    Output is a pure function of the arguments: every batch draws from its own
+    generator spawned from `seed`, and nothing touches the global NumPy RNG.
+    `end` is the epoch of the newest profile (default: today's midnight UTC);
+    the fleet has n_floats * cycles * len(levels) observations.
+    """
+    if end is None:
+        end = int(pd.Timestamp.now(tz='UTC').normalize().timestamp())
+    starts = range(0, n_floats, batch_floats)
+    for first, child in zip(starts, np.random.SeedSequence(seed).spawn(len(starts))):
+        rng = np.random.default_rng(child)
+        size = min(batch_floats, n_floats - first)
+        df = _synthetic_batch(rng, first, size, cycles, levels, end, cycle_days)
+        ids = [str(SYNTHETIC_FLOAT_ID_BASE + code) for code in range(first, first + size)]
+        df['float_id'] = pd.Categorical.from_codes(df['float_id'].to_numpy() - first, categories=ids)
+        yield df
+
+
+def generate_synthetic_fleet(n_floats: int, **kwargs) -> pd.DataFrame:
+    """A synthetic fleet as one compact frame (see synthetic_fleet_batches)"""
+    frames = list(synthetic_fleet_batches(n_floats, **kwargs))
+    if len(frames) == 1:
+        return frames[0]
+    float_ids = pd.api.types.union_categoricals([frame.pop('float_id') for frame in frames])
+    df = pd.concat(frames, ignore_index=True)
+    df['float_id'] = float_ids
+    return df
+
+
+class SyntheticDataSource(DataSource):
+    """A deterministic synthetic fleet, for benchmarks and load tests without upstream data"""
+
+    name = 'synthetic'
+
+    def __init__(self, n_floats: int, cycles: int, seed: int = 42):
+        self.n_floats = n_floats
+        self.cycles = cycles
+        self.seed = seed
+        self._fleet = None
+        self._lock = threading.Lock()
+
+    def fleet(self) -> pd.DataFrame:
+        with self._lock:
+            if self._fleet is None:
+                started = time.perf_counter()
+                self._fleet = generate_synthetic_fleet(self.n_floats, cycles=self.cycles, seed=self.seed)
+                print(f"Generated {len(self._fleet)} synthetic observations in {time.perf_counter() - started:.1f}s")
+            return self._fleet
+
+    def select(self, region, days_back: int) -> pd.DataFrame:
+        fleet = self.fleet()
+        end = int(fleet['deployment_epoch'].max())
+        lon_min, lon_max = REGION_LONGITUDE_BOUNDS.get(region_key(region), (-180, 180))
+        mask = ((fleet['deployment_epoch'].to_numpy() >= end - days_back * 86400)
+                & fleet['longitude'].between(lon_min, lon_max).to_numpy())
+        return fleet[mask].reset_index(drop=True)
+
+    def observations(self, region=None, days_back=7, timeout=ERDDAP_TIMEOUT) -> pd.DataFrame:
+        return self.select(region, days_back)
+
+    def float_locations(self, region=None, timeout=ERDDAP_TIMEOUT) -> pd.DataFrame:
+        return latest_surface_positions(self.select(region, 30))
+
+    def metrics(self) -> dict:
+        return {**super().metrics(), 'floats': self.n_floats,
+                'observations': 0 if self._fleet is None else len(self._fleet)}
+
+
+DATA_SOURCES = {
+    'erddap': ErddapDataSource,
+    'gdac': lambda: GdacDataSource(os.environ.get("ARGO_GDAC_ROOT", "gdac")),
+    'zarr': lambda: ZarrDataSource(os.environ.get("ARGO_ZARR_PATH", "argo.zarr")),
+    'synthetic': lambda: SyntheticDataSource(int(os.environ.get("ARGO_SYNTHETIC_FLOATS", "4000")),
+                                             int(os.environ.get("ARGO_SYNTHETIC_CYCLES", "36"))),
+}
+
+
+def create_data_source(name: str) -> DataSource:
+    if name not in DATA_SOURCES:
+        raise ValueError(f"Unknown ARGO_DATA_SOURCE {name!r}; expected one of {', '.join(DATA_SOURCES)}")
+    return DATA_SOURCES[name]()
+
+
+data_source = create_data_source(os.environ.get("ARGO_DATA_SOURCE", "erddap").lower())
+
+
+# Frames published as snapshots, by id(), so derived frames never reuse their cache key
+_snapshot_frames = {}
+
+
+def frame_snapshot_id(df: pd.DataFrame):
+    entry = _snapshot_frames.get(id(df))
+    if entry is not None and entry[0]() is df:
+        return entry[1]
+    return None
+
+
+class Snapshot:
+    """An immutable prebuilt frame plus the bookkeeping of when and how it was fetched"""
+
+    __slots__ = ('frame', 'snapshot_id', 'fetched_at', 'fetch_seconds', 'generation')
+
+    def __init__(self, frame, snapshot_id, fetched_at, fetch_seconds, generation):
+        self.frame = frame
+        self.snapshot_id = snapshot_id
+        self.fetched_at = fetched_at
+        self.fetch_seconds = fetch_seconds
+        self.generation = generation
+
+    @property
+    def age_seconds(self) -> float:
+        return time.time() - self.fetched_at
+
+
+class SnapshotStore:
+    """Latest snapshot per (kind, region); a refresh swaps in a new object atomically"""
+
+    def __init__(self):
+        self._snapshots = {}
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def get(self, kind: str, region):
+        return self._snapshots.get((kind, region_key(region)))
+
+    def publish(self, kind: str, region, frame: pd.DataFrame, fetch_seconds: float = 0.0,
+                fetched_at: float = None, snapshot_id: str = None, notify: bool = True) -> Snapshot:
+        with self._lock:
+            self._generation += 1
+            snapshot = Snapshot(frame, snapshot_id or uuid.uuid4().hex, fetched_at or time.time(),
+                                fetch_seconds, self._generation)
+            _snapshot_frames[id(frame)] = (weakref.ref(frame), snapshot.snapshot_id)
+            previous = self._snapshots.get((kind, region_key(region)))
+            self._snapshots[(kind, region_key(region))] = snapshot
+            if previous is not None:
+                _snapshot_frames.pop(id(previous.frame), None)
+        if notify:
+            notify_snapshot_refresh(kind, region_key(region), frame)
+        return snapshot
+
+    def items(self):
+        return list(self._snapshots.items())
+
+
+snapshot_store = SnapshotStore()
+
+# Snapshots persisted as one .npy file per column plus a JSON manifest, so a new process
+# maps the last good data at startup instead of waiting for ERDDAP
+SNAPSHOT_DIR = os.environ.get("ARGO_SNAPSHOT_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "snapshots"))
+_snapshot_write_lock = threading.Lock()
+
+
+def _snapshot_name(kind: str, region) -> str:
+    return f"{kind}-{region_key(region) or 'global'}"
+
+
+def write_snapshot(kind: str, region, snapshot: Snapshot, directory: str = SNAPSHOT_DIR):
+    """Persist a snapshot's columns; the manifest is swapped in last, so readers never see a partial write"""
+    name = _snapshot_name(kind, region)
+    data_name = f"{name}.{snapshot.snapshot_id}"
+    build_dir = os.path.join(directory, f".building-{data_name}")
+    os.makedirs(build_dir, exist_ok=True)
+    columns = []
+    for position, col in enumerate(snapshot.frame.columns):
+        series = snapshot.frame[col]
+        categories = None
+        if not isinstance(series.dtype, pd.CategoricalDtype) and not np.issubdtype(series.dtype, np.number):
+            series = series.astype(str).astype('category')
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            categories = [str(value) for value in series.cat.categories]
+            values = series.cat.codes.to_numpy()
+        else:
+            values = series.to_numpy()
+        np.save(os.path.join(build_dir, f"{position}.npy"), values, allow_pickle=False)
+        columns.append({'name': col, 'file': f"{position}.npy", 'categories': categories})
+    os.replace(build_dir, os.path.join(directory, data_name))
+
+    manifest = {'kind': kind, 'region': region_key(region), 'snapshot_id': snapshot.snapshot_id,
+                'fetched_at': snapshot.fetched_at, 'fetch_seconds': snapshot.fetch_seconds,
+                'rows': len(snapshot.frame), 'data': data_name, 'columns': columns}
+    manifest_path = os.path.join(directory, f"{name}.json")
+    with open(f"{manifest_path}.tmp", 'w') as f:
+        json.dump(manifest, f)
+    os.replace(f"{manifest_path}.tmp", manifest_path)
+
+    # Older data directories can go; processes that still map them keep the open files
+    for entry in os.listdir(directory):
+        if entry.startswith(f"{name}.") and entry != data_name and not entry.endswith('.json'):
+            shutil.rmtree(os.path.join(directory, entry), ignore_errors=True)
+
+
+def read_snapshot_generation(directory: str = SNAPSHOT_DIR) -> int:
+    """Counter bumped after every persisted snapshot; workers poll it to notice new data"""
+    try:
+        with open(os.path.join(directory, 'generation')) as f:
+            return int(f.read().strip() or 0)
+    except (OSError, ValueError):
+        return 0
+
+
+def _bump_snapshot_generation(directory: str = SNAPSHOT_DIR) -> int:
+    generation = read_snapshot_generation(directory) + 1
+    path = os.path.join(directory, 'generation')
+    with open(f"{path}.tmp", 'w') as f:
+        f.write(str(generation))
+    os.replace(f"{path}.tmp", path)
+    return generation
+
+
+def persist_snapshot(kind: str, region, snapshot: Snapshot):
+    """Write the snapshot to SNAPSHOT_DIR unless a newer one has been published meanwhile.
+
+    Once written, this process swaps its private frame for the memory-mapped copy,
+    so every worker, this one included, shares the same read-only pages.
+    """
+    if not SNAPSHOT_DIR:
+        return
+    with _snapshot_write_lock:
+        if snapshot_store.get(kind, region) is not snapshot:
+            return
+        try:
+            started = time.perf_counter()
+            os.makedirs(SNAPSHOT_DIR, exist_ok=True)
+            write_snapshot(kind, region, snapshot)
+            generation = _bump_snapshot_generation()
+            frame, _ = read_snapshot(os.path.join(SNAPSHOT_DIR, f"{_snapshot_name(kind, region)}.json"))
+            snapshot_store.publish(kind, region, frame, snapshot.fetch_seconds, fetched_at=snapshot.fetched_at,
+                                   snapshot_id=snapshot.snapshot_id, notify=False)
+            print(f"Persisted snapshot {_snapshot_name(kind, region)} (generation {generation}) "
+                  f"in {time.perf_counter() - started:.2f}s")
+        except Exception as e:
+            print(f"Persisting snapshot {_snapshot_name(kind, region)} failed: {e}")
+
+
+def read_snapshot(manifest_path: str, manifest: dict = None):
+    """Map a persisted snapshot read-only (zero-copy); returns (frame, manifest)"""
+    if manifest is None:
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+    data_dir = os.path.join(os.path.dirname(manifest_path), manifest['data'])
+    columns = {}
+    for column in manifest['columns']:
+        values = np.load(os.path.join(data_dir, column['file']), mmap_mode='r', allow_pickle=False)
+        if column['categories'] is not None:
+            values = pd.Categorical.from_codes(values, categories=column['categories'])
+        columns[column['name']] = values
+    return pd.DataFrame(columns, copy=False), manifest
+
+
+def restore_snapshots(store: SnapshotStore, directory: str = SNAPSHOT_DIR, notify: bool = True) -> int:
+    """Publish persisted snapshots newer than the ones in `store`; returns how many were attached"""
+    if not directory or not os.path.isdir(directory):
+        return 0
+    restored = 0
+    for entry in sorted(os.listdir(directory)):
+        if not entry.endswith('.json'):
+            continue
+        path = os.path.join(directory, entry)
+        try:
+            with open(path) as f:
+                manifest = json.load(f)
+            current = store.get(manifest['kind'], manifest['region'])
+            if current is not None and (current.snapshot_id == manifest['snapshot_id']
+                                        or current.fetched_at >= manifest['fetched_at']):
+                continue
+            frame, manifest = read_snapshot(path, manifest)
+        except Exception as e:
+            print(f"Skipping unreadable snapshot {entry}: {e}")
+            continue
+        store.publish(manifest['kind'], manifest['region'], frame, manifest['fetch_seconds'],
+                      fetched_at=manifest['fetched_at'], snapshot_id=manifest['snapshot_id'], notify=notify)
+        restored += 1
+    return restored
+
+# Background refresh of the configured regions
+REFRESH_INTERVAL = float(os.environ.get("ARGO_REFRESH_INTERVAL", "600"))
+REFRESH_JITTER = 0.1
+REFRESH_REGIONS = [None if name.strip() == 'global' else name.strip()
+                   for name in os.environ.get("ARGO_REFRESH_REGIONS", "global,pacific,atlantic,indian").split(',')
+                   if name.strip()]
+SNAPSHOT_LOADERS = {
+    'observations': lambda region, timeout: data_source.observations(region, 7, timeout),
+    'locations': lambda region, timeout: data_source.float_locations(region, timeout),
+}
+
+
+SNAPSHOT_POLL_INTERVAL = float(os.environ.get("ARGO_SNAPSHOT_POLL_SECONDS", "2"))
+
+
+class SnapshotRefresher:
+    """Refreshes every (kind, region) snapshot on a jittered interval in a daemon thread.
+
+    A per-job lock guards against overlapping refreshes: the scheduler skips a job
+    that is already running, and a cold request waits for it instead of fetching twice.
+    With a snapshot directory, the worker holding its `refresher.lock` is the only one
+    fetching and persisting; the others follow the generation counter and attach to
+    each new snapshot's memory-mapped files. A follower takes over when the leader exits.
+    """
+
+    def __init__(self, store: SnapshotStore, regions, interval: float, jitter: float = REFRESH_JITTER):
+        self.store = store
+        self.jobs = [(kind, region_key(region)) for kind in SNAPSHOT_LOADERS for region in regions]
+        self.interval = interval
+        self.jitter = jitter
+        self._job_locks = {}
+        self._job_stats = {}
+        self._locks_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._pid = None
+        self._leader_lock = None
+        self._generation_seen = None
+
+    def _lock_for(self, job):
+        with self._locks_lock:
+            return self._job_locks.setdefault(job, threading.Lock())
+
+    def refresh(self, kind: str, region, wait: bool = False, timeout: float = ERDDAP_TIMEOUT):
+        """Fetch one snapshot and publish it; returns the snapshot or None if skipped/failed"""
+        job = (kind, region_key(region))
+        lock = self._lock_for(job)
+        if not lock.acquire(blocking=wait, timeout=timeout if wait else -1):
+            return None
+        try:
+            if wait and self.store.get(*job) is not None:
+                return self.store.get(*job)  # Another caller refreshed while we waited
+            stats = self._job_stats.setdefault(job, {'refreshes': 0, 'failures': 0, 'last_error': None,
+                                                     'last_duration_seconds': None})
+            started = time.perf_counter()
+            try:
+                frame = SNAPSHOT_LOADERS[kind](region=job[1], timeout=timeout)
+            except Exception as e:
+                stats['failures'] += 1
+                stats['last_error'] = str(e)
+                stats['last_duration_seconds'] = round(time.perf_counter() - started, 3)
+                print(f"Snapshot refresh {kind}/{job[1] or 'global'} failed: {e}")
+                return None
+            duration = time.perf_counter() - started
+            stats['refreshes'] += 1
+            stats['last_error'] = None
+            stats['last_duration_seconds'] = round(duration, 3)
+            snapshot = self.store.publish(kind, job[1], frame, duration)
+            if self.is_leader():
+                threading.Thread(target=persist_snapshot, args=(kind, job[1], snapshot), daemon=True).start()
+            return snapshot
+        finally:
+            lock.release()
+
+    def is_leader(self) -> bool:
+        """Whether this process refreshes and persists snapshots for the others.
+
+        Without a snapshot directory or a scheduler every process is on its own. Otherwise
+        only the scheduler thread elects (see _elect), so a refresh in a pre-fork master
+        never takes the lock away from its workers.
+        """
+        if not SNAPSHOT_DIR or fcntl is None or self.interval <= 0:
+            return True
+        return self._leader_lock is not None and self._pid == os.getpid()
+
+    def _elect(self) -> bool:
+        """Try to become the leader (non-blocking); called from the scheduler thread only"""
+        if self.is_leader():
+            return True
+        os.makedirs(SNAPSHOT_DIR, exist_ok=True)
+        lock_file = open(os.path.join(SNAPSHOT_DIR, 'refresher.lock'), 'a+')
+        try:
+            # lockf locks belong to the process: not inherited by forks, released when it exits
+            fcntl.lockf(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        self._leader_lock = lock_file
+        print(f"Process {os.getpid()} is the snapshot refresher")
+        return True
+
+    def follow(self):
+        """Attach to snapshots the leader persisted since the last call"""
+        generation = read_snapshot_generation()
+        if generation != self._generation_seen:
+            self._generation_seen = generation
+            restore_snapshots(self.store)
+
+    def _run(self):
+        while not self._stop.is_set():
+            if not self._elect():
+                self.follow()
+                self._stop.wait(SNAPSHOT_POLL_INTERVAL)
+                continue
+            for kind, region in self.jobs:
+                if self._stop.is_set():
+                    break
+                self.refresh(kind, region)
+            delay = self.interval * (1 + random.uniform(-self.jitter, self.jitter))
+            self._stop.wait(delay)
+
+    def start(self):
+        """Start the scheduler thread once per process (threads don't survive a fork)"""
+        if self._pid == os.getpid():
+            return
+        self._pid = os.getpid()
+        # Snapshots restored at import (possibly in a pre-fork master) were published
+        # silently; announce them here so this worker's listeners start their builds
+        for (kind, region), snapshot in self.store.items():
+            notify_snapshot_refresh(kind, region, snapshot.frame)
+        if self.interval <= 0:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="snapshot-refresher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def after_fork(self):
+        """Drop the parent's locks in a forked child: lockf locks aren't inherited, and
+        a job lock held by a parent thread would never be released here"""
+        self._leader_lock = None
+        self._locks_lock = threading.Lock()
+        self._job_locks = {}
+
+    def metrics(self) -> dict:
+        jobs = {}
+        for (kind, region), snapshot in self.store.items():
+            jobs[f"{kind}/{region or 'global'}"] = {
+                'generation': snapshot.generation,
+                'refresh_lag_seconds': round(snapshot.age_seconds, 1),
+                'fetch_seconds': round(snapshot.fetch_seconds, 3),
+            }
+        for (kind, region), stats in list(self._job_stats.items()):
+            jobs.setdefault(f"{kind}/{region or 'global'}", {}).update(stats)
+        return {'interval_seconds': self.interval, 'running': self._thread is not None and self._thread.is_alive(),
+                'role': 'leader' if self.is_leader() else 'follower',
+                'generation': read_snapshot_generation() if SNAPSHOT_DIR else None,
+                'jobs': jobs}
+
+
+snapshot_refresher = SnapshotRefresher(snapshot_store, REFRESH_REGIONS, REFRESH_INTERVAL)
+
+
+def get_snapshot(kind: str, region=None, deadline: Deadline = None):
+    """Latest prebuilt snapshot; a cold process fetches it once (shared with the scheduler)"""
+    snapshot = snapshot_store.get(kind, region)
+    if snapshot is None and (deadline is None or deadline.allow_live_fetch()):
+        timeout = ERDDAP_TIMEOUT if deadline is None else min(ERDDAP_TIMEOUT, deadline.remaining())
+        snapshot = snapshot_refresher.refresh(kind, region, wait=True, timeout=timeout)
+    return snapshot
+
+
+# Snapshots older than this, or served while the data source is failing, are marked stale
+SNAPSHOT_STALE_AFTER = max(2 * REFRESH_INTERVAL, 60)
+
+
+def _snapshot_frame(snapshot: Snapshot) -> pd.DataFrame:
+    """The snapshot's frame with its staleness and age recorded in `attrs`"""
+    frame = snapshot.frame
+    frame.attrs['age_seconds'] = round(snapshot.age_seconds, 1)
+    frame.attrs['stale'] = not data_source.healthy or snapshot.age_seconds > SNAPSHOT_STALE_AFTER
+    return frame
+
+
+def data_freshness(df: pd.DataFrame) -> dict:
+    """Response fields describing how fresh the data behind a chart or map is"""
+    if df.attrs.get('synthetic'):
+        return {"data_synthetic": True, "data_stale": True}
+    if 'stale' not in df.attrs:
+        return {}
+    return {"data_stale": df.attrs['stale'], "data_age_seconds": df.attrs['age_seconds']}
+
+
+def synthetic_fallback(query: str, deadline: Deadline = None) -> pd.DataFrame:
+    """Sample floats for when no real data can be had, flagged so they are never passed off as real"""
+    df = generate_sample_data(query)
+    df.attrs['synthetic'] = True
+    if deadline is not None:
+        deadline.degrade('synthetic_data')
+    return df
+
+
+def fetch_real_time_argo_data(region=None, days_back=7, deadline: Deadline = None):
+    """Fetch real-time ARGO float data, served from the prebuilt snapshot when possible"""
+    try:
+        if days_back != 7 and (deadline is None or deadline.allow_live_fetch()):
+            timeout = ERDDAP_TIMEOUT if deadline is None else min(ERDDAP_TIMEOUT, deadline.remaining())
+            return data_source.observations(region, days_back, timeout)
+        snapshot = get_snapshot('observations', region, deadline)
+        if snapshot is not None:
+            return _snapshot_frame(snapshot)
     except Exception as e:
         print(f"Error fetching real-time ARGO data: {e}")
-        # Return sample data as fallback
-        return generate_sample_data("real-time fallback")
+        # Last known good snapshot beats synthetic data
+        snapshot = snapshot_store.get('observations', region)
+        if snapshot is not None:
+            return _snapshot_frame(snapshot)
+    
+    # Fallback to sample data if real-time fetch fails
+    return synthetic_fallback("real-time fallback", deadline)
 
 
-def fetch_argo_float_locations(region=None):
-    """Fetch current ARGO float locations for mapping"""
+def fetch_argo_float_locations(region=None, deadline: Deadline = None):
+    """Fetch current ARGO float locations for mapping, served from the prebuilt snapshot"""
     try:
-        # Use a different endpoint for float locations
-        base_url = "https://polarwatch.noaa.gov/erddap/tabledap/argoFloats.json"
-        
-        # Get data from last 30 days to ensure we have recent locations
-        end_date = datetime.now()
-        start_date = end_date - timedelta(days=30)
-        
-        params = {
-            'time>=': start_date.strftime('%Y-%m-%dT%H:%M:%SZ'),
-            'time<=': end_date.strftime('%Y-%m-%dT%H:%M:%SZ'),
-            'latitude>=': -90,
-            'latitude<=': 90,
-            'longitude>=': -180,
-            'longitude<=': 180
-        }
-        
-        # Add region constraints
-        if region:
-            if 'pacific' in region.lower():
-                params['longitude>='] = -180
-                params['longitude<='] = -100
-            elif 'atlantic' in region.lower():
-                params['longitude>='] = -100
-                params['longitude<='] = 20
-            elif 'indian' in region.lower():
-                params['longitude>='] = 20
-                params['longitude<='] = 180
-        
-        response = requests.get(base_url, params=params, timeout=30)
-        
-        if response.status_code == 200:
-            data = response.json()
-            if 'table' in data and 'rows' in data['table']:
-                columns = [col['name'] for col in data['table']['columnNames']]
-                rows = data['table']['rows']
-                
-                df = pd.DataFrame(rows, columns=columns)
-                
-                # Process location data
-                df = df.dropna(subset=['latitude', 'longitude'])
-                df['latitude'] = pd.to_numeric(df['latitude'], errors='coerce')
-                df['longitude'] = pd.to_numeric(df['longitude'], errors='coerce')
-                
-                # Get unique float locations (latest position for each float)
-                df = df.groupby('platform_number').agg({
-                    'latitude': 'last',
-                    'longitude': 'last',
-                    'time': 'last'
-                }).reset_index()
-                
-                # Add float metadata
-                df['float_id'] = df['platform_number']
-                df['status'] = 'active'
-                df['deployment_date'] = pd.to_datetime(df['time'])
-                df['temperature'] = np.random.normal(15, 5, len(df))  # Placeholder
-                df['salinity'] = np.random.normal(35, 2, len(df))  # Placeholder
-                df['depth'] = np.random.uniform(0, 2000, len(df))  # Placeholder
-                
-                # Ensure all required columns exist with proper data types
-                required_columns = ['latitude', 'longitude', 'float_id', 'status', 'deployment_date', 'temperature', 'salinity', 'depth']
-                for col in required_columns:
-                    if col not in df.columns:
-                        if col == 'status':
-                            df[col] = 'active'
-                        elif col == 'float_id':
-                            df[col] = df.get('platform_number', 'UNKNOWN')
-                        elif col == 'deployment_date':
-                            df[col] = pd.to_datetime(df.get('time', datetime.now()))
-                        else:
-                            df[col] = 0
-                
-                return df.dropna()
-        
-        # Fallback to sample data
-        return generate_sample_data("location fallback")
-        
+        snapshot = get_snapshot('locations', region, deadline)
+        if snapshot is not None:
+            return _snapshot_frame(snapshot)
     except Exception as e:
         print(f"Error fetching ARGO float locations: {e}")
-        return generate_sample_data("location fallback")
+    
+    # Fallback to sample data
+    return synthetic_fallback("location fallback", deadline)
 
 
 def is_graph_query(message: str) -> bool:
@@ -261,6 +1427,116 @@ def is_map_query(message: str) -> bool:
     return any(keyword in message_lower for keyword in map_keywords)
 
 
+# Fixed headers the graph and map prompts ask the model to answer with
+GRAPH_DATA_COLUMNS = ['temperature', 'salinity', 'depth', 'latitude', 'longitude', 'date']
+LOCATION_DATA_COLUMNS = ['latitude', 'longitude', 'region']
+_TEXT_COLUMNS = ('date', 'region')
+
+
+def _strip_code_fence(text: str) -> str:
+    """Remove a surrounding markdown code fence (```csv / ```json) if present"""
+    text = text.strip()
+    if text.startswith('```'):
+        text = text.split('\n', 1)[1] if '\n' in text else ''
+        if text.rstrip().endswith('```'):
+            text = text.rstrip()[:-3]
+    return text.strip()
+
+
+def parse_structured_data(ai_response: str, columns: list) -> pd.DataFrame:
+    """Strictly parse a JSON array or a CSV block with a fixed header into typed columns.
+
+    Returns an empty DataFrame when the response is not in the requested format so the
+    caller can fall back to the regex extractor.
+    """
+    text = _strip_code_fence(ai_response or '')
+    if not text:
+        return pd.DataFrame()
+
+    try:
+        if text.startswith('['):
+            records = json.loads(text)
+            if not isinstance(records, list):
+                return pd.DataFrame()
+            df = pd.DataFrame.from_records([r for r in records if isinstance(r, dict)], columns=columns)
+        else:
+            # Locate the fixed header and read everything after it in one vectorized pass
+            header = ','.join(columns)
+            lines = text.splitlines()
+            start = next((i for i, line in enumerate(lines)
+                          if line.replace(' ', '').lower() == header), None)
+            if start is None:
+                return pd.DataFrame()
+            block = '\n'.join(lines[start + 1:])
+            if not block.strip():
+                return pd.DataFrame()
+            df = pd.read_csv(io.StringIO(block), names=columns, header=None,
+                             skipinitialspace=True, on_bad_lines='skip', dtype=str)
+    except (ValueError, pd.errors.ParserError) as e:
+        print(f"Structured data parse failed: {e}")
+        return pd.DataFrame()
+
+    numeric_columns = [col for col in columns if col not in _TEXT_COLUMNS]
+    for col in numeric_columns:
+        df[col] = pd.to_numeric(df[col], errors='coerce')
+    if 'date' in df.columns:
+        df['date'] = pd.to_datetime(df['date'], format='%Y-%m-%d', errors='coerce')
+
+    # Rows without any numeric value are prose or malformed lines
+    df = df.dropna(subset=numeric_columns, how='all').reset_index(drop=True)
+    if 'date' in df.columns and df['date'].isna().all():
+        df['date'] = pd.Timestamp.now()
+    return df
+
+
+class IncrementalDataExtractor:
+    """Collect complete CSV data lines from a streamed completion as they arrive"""
+
+    def __init__(self, columns: list):
+        self.columns = columns
+        self._header = ','.join(columns)
+        self._header_seen = False
+        self._pending = ''
+        self._chunks = []
+        self._lines = []
+
+    @property
+    def point_count(self) -> int:
+        return len(self._lines)
+
+    def feed(self, text: str) -> int:
+        """Add streamed text and return the number of new complete data lines"""
+        self._chunks.append(text)
+        self._pending += text
+        *complete, self._pending = self._pending.split('\n')
+        before = len(self._lines)
+        for line in complete:
+            self._add_line(line)
+        return len(self._lines) - before
+
+    def _add_line(self, line: str):
+        line = line.strip()
+        if not line or line.startswith('```'):
+            return
+        if not self._header_seen:
+            self._header_seen = line.replace(' ', '').lower() == self._header
+        elif line.count(',') == len(self.columns) - 1:
+            self._lines.append(line)
+
+    def frame(self) -> pd.DataFrame:
+        """Parse the data lines received so far into typed columns"""
+        if not self._lines:
+            return pd.DataFrame()
+        return parse_structured_data(self._header + '\n' + '\n'.join(self._lines), self.columns)
+
+    def close(self) -> str:
+        """Flush the trailing partial line and return the full response text"""
+        if self._pending:
+            self._add_line(self._pending)
+            self._pending = ''
+        return ''.join(self._chunks)
+
+
 def extract_data_from_ai_response(ai_response: str, query: str) -> pd.DataFrame:
     """Extract actual data values from AI response for graph visualization"""
     
@@ -439,32 +1715,28 @@ def extract_data_from_ai_response(ai_response: str, query: str) -> pd.DataFrame:
     return pd.DataFrame()
 
 
-def extract_data_from_response(ai_response: str, query: str, data_type: str = "graph") -> pd.DataFrame:
+def extract_data_from_response(ai_response: str, query: str, data_type: str = "graph",
+                               deadline: Deadline = None) -> pd.DataFrame:
     """Extract meaningful data from AI response for both graph and map visualizations"""
     
     # For graph requests, prioritize AI response data extraction
     if data_type == "graph":
-        # Extract data from AI response first (this is what we want for graphs)
+        # Structured CSV/JSON is parsed strictly; the regex extractor is only a fallback
+        ai_data = parse_structured_data(ai_response, GRAPH_DATA_COLUMNS)
+        if not ai_data.empty:
+            print(f"Using structured AI data with {len(ai_data)} data points")
+            return ai_data
+
         ai_data = extract_data_from_ai_response(ai_response, query)
         if not ai_data.empty:
             print(f"Using AI response data with {len(ai_data)} data points")
             return ai_data
         
         # Only try real-time data as fallback if AI extraction fails
-        region = None
-        if 'pacific' in ai_response.lower():
-            region = 'pacific'
-        elif 'atlantic' in ai_response.lower():
-            region = 'atlantic'
-        elif 'indian' in ai_response.lower():
-            region = 'indian'
-        elif 'arctic' in ai_response.lower():
-            region = 'arctic'
-        elif 'southern' in ai_response.lower():
-            region = 'southern'
+        region = detect_region(ai_response)
         
         try:
-            real_data = fetch_real_time_argo_data(region=region, days_back=7)
+            real_data = fetch_real_time_argo_data(region=region, days_back=7, deadline=deadline)
             if not real_data.empty:
                 print(f"Using real-time data with {len(real_data)} data points")
                 return real_data
@@ -478,21 +1750,11 @@ def extract_data_from_response(ai_response: str, query: str, data_type: str = "g
     # Handle map data requests
     elif data_type == "map":
         # Determine region from AI response
-        region = None
-        if 'pacific' in ai_response.lower():
-            region = 'pacific'
-        elif 'atlantic' in ai_response.lower():
-            region = 'atlantic'
-        elif 'indian' in ai_response.lower():
-            region = 'indian'
-        elif 'arctic' in ai_response.lower():
-            region = 'arctic'
-        elif 'southern' in ai_response.lower():
-            region = 'southern'
+        region = detect_region(ai_response)
         
         # Try to fetch real-time ARGO float locations first
         try:
-            real_locations = fetch_argo_float_locations(region=region)
+            real_locations = fetch_argo_float_locations(region=region, deadline=deadline)
             if not real_locations.empty:
                 return real_locations
         except Exception as e:
@@ -507,26 +1769,326 @@ def extract_data_from_response(ai_response: str, query: str, data_type: str = "g
 
 
 def generate_sample_data(query: str) -> pd.DataFrame:
-    """Generate sample oceanographic data based on the query"""
-    np.random.seed(42)  # For reproducible results
-    
-    # Generate sample ARGO float data
-    n_points = 100
-    data = {
-        'latitude': np.random.uniform(-60, 60, n_points),
-        'longitude': np.random.uniform(-180, 180, n_points),
-        'temperature': np.random.normal(15, 10, n_points),
-        'salinity': np.random.normal(35, 2, n_points),
-        'depth': np.random.uniform(0, 2000, n_points),
-        'oxygen': np.random.normal(200, 50, n_points),
-        'date': pd.date_range('2023-01-01', periods=n_points, freq='D')
-    }
-    
-    return pd.DataFrame(data)
+    """Generate sample oceanographic data based on the query: one profile from each of 10 synthetic floats"""
+    return generate_synthetic_fleet(10, cycles=1, levels=(5, 50, 100, 200, 300, 500, 750, 1000, 1500, 2000))
+
+
+# Standard depth levels (m) used to summarize vertical profiles
+STANDARD_DEPTH_LEVELS = (0, 10, 20, 30, 50, 75, 100, 125, 150, 200, 250, 300, 400, 500,
+                         600, 700, 800, 900, 1000, 1100, 1200, 1300, 1400, 1500, 1750, 2000)
+PROFILE_VARIABLES = ('temperature', 'salinity')
+
+
+class LRUCache:
+    """Small thread-safe LRU cache for derived per-snapshot results, with an optional TTL"""
+
+    def __init__(self, max_items: int, ttl: float = None):
+        self.max_items = max_items
+        self.ttl = ttl
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            if key not in self._items:
+                return None
+            expires, value = self._items[key]
+            if expires is not None and expires < time.monotonic():
+                del self._items[key]
+                return None
+            self._items.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        expires = time.monotonic() + self.ttl if self.ttl else None
+        with self._lock:
+            self._items[key] = (expires, value)
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_items:
+                self._items.popitem(last=False)
+
+    def __len__(self):
+        return len(self._items)
+
+    def values(self) -> list:
+        with self._lock:
+            return [value for _, value in self._items.values()]
+
+
+_profile_summary_cache = LRUCache(32)
+
+
+def frame_cache_key(df: pd.DataFrame) -> str:
+    """Cache key for a frame: its snapshot id when it has one, otherwise a content hash"""
+    snapshot_id = frame_snapshot_id(df)
+    if snapshot_id:
+        return snapshot_id
+    hashed = pd.util.hash_pandas_object(df, index=False).to_numpy()
+    return hashlib.sha1(hashed.tobytes()).hexdigest()
+
+
+def _profile_codes(data: pd.DataFrame):
+    """Group observations into profiles by platform and cycle; None if they can't be told apart"""
+    platform = next((col for col in ('platform_number', 'float_id') if col in data.columns), None)
+    if platform is None:
+        return None
+    cycle = next((col for col in ('cycle_number', 'deployment_epoch', 'date') if col in data.columns), None)
+    keys = [platform] if cycle is None else [platform, cycle]
+    return data.groupby(keys, sort=False, observed=True).ngroup().to_numpy()
+
+
+def interpolate_profiles(data: pd.DataFrame, variables=PROFILE_VARIABLES, levels=STANDARD_DEPTH_LEVELS):
+    """Linearly interpolate every profile onto the standard depth levels at once.
+
+    Observations are sorted by (profile, depth) and turned into one monotonic search
+    key, so a single np.searchsorted finds the bracketing samples of every level in
+    every profile. Levels outside a profile's sampled range are NaN.
+
+    Returns (levels, {variable: array of shape (n_profiles, n_levels)}).
+    """
+    levels = np.asarray(levels, dtype='float64')
+    codes = _profile_codes(data)
+    if codes is None:
+        codes = np.zeros(len(data), dtype='int64')
+
+    depth = data['depth'].to_numpy(dtype='float64')
+    keep = np.isfinite(depth) & (codes >= 0)
+    codes, depth = codes[keep], depth[keep]
+    if len(depth) == 0:
+        return levels, {var: np.empty((0, len(levels))) for var in variables}
+
+    order = np.lexsort((depth, codes))
+    codes, depth = codes[order], depth[order]
+    n_profiles = int(codes.max()) + 1
+
+    # Offset each profile so keys are increasing across the whole sorted array
+    base = min(depth.min(), levels.min())
+    span = max(depth.max(), levels.max()) - base + 1.0
+    key = codes * span + (depth - base)
+    query = (np.arange(n_profiles)[:, None] * span + (levels - base)[None, :]).ravel()
+
+    hi = np.searchsorted(key, query, side='left')
+    lo = hi - 1
+    hi_c = np.clip(hi, 0, len(key) - 1)
+    lo_c = np.clip(lo, 0, len(key) - 1)
+    profile = np.repeat(np.arange(n_profiles), len(levels))
+    exact = (hi < len(key)) & (codes[hi_c] == profile) & (key[hi_c] == query)
+    bracketed = (lo >= 0) & (hi < len(key)) & (codes[lo_c] == profile) & (codes[hi_c] == profile)
+
+    gap = key[hi_c] - key[lo_c]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        weight = np.where(gap > 0, (query - key[lo_c]) / gap, 0.0)
+
+    grids = {}
+    for var in variables:
+        if var not in data.columns:
+            continue
+        values = data[var].to_numpy(dtype='float64')[keep][order]
+        grid = np.where(bracketed, values[lo_c] + weight * (values[hi_c] - values[lo_c]), np.nan)
+        grid = np.where(exact, values[hi_c], grid)
+        grids[var] = grid.reshape(n_profiles, len(levels))
+    return levels, grids
+
+
+def profile_summary(data: pd.DataFrame, variables=PROFILE_VARIABLES, min_profiles: int = 2):
+    """Mean and spread envelopes of the interpolated profiles, cached per frame.
+
+    Returns a DataFrame indexed by standard depth with <var>_mean, <var>_std, <var>_p10,
+    <var>_p90 and <var>_count columns, or None when the data holds fewer than
+    `min_profiles` distinguishable profiles.
+    """
+    if data.empty or 'depth' not in data.columns:
+        return None
+    codes = _profile_codes(data)
+    if codes is None or len(np.unique(codes)) < min_profiles:
+        return None
+
+    cache_key = (frame_cache_key(data), tuple(variables))
+    cached = _profile_summary_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    levels, grids = interpolate_profiles(data, variables)
+    summary = pd.DataFrame({'depth': levels})
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', category=RuntimeWarning)  # all-NaN depth levels
+        for var, grid in grids.items():
+            summary[f'{var}_mean'] = np.nanmean(grid, axis=0)
+            summary[f'{var}_std'] = np.nanstd(grid, axis=0)
+            summary[f'{var}_p10'] = np.nanpercentile(grid, 10, axis=0)
+            summary[f'{var}_p90'] = np.nanpercentile(grid, 90, axis=0)
+            summary[f'{var}_count'] = np.isfinite(grid).sum(axis=0)
+    summary = summary.dropna(how='all', subset=[c for c in summary.columns if c.endswith('_mean')])
+    summary.attrs['profiles'] = len(np.unique(codes))
+
+    _profile_summary_cache.put(cache_key, summary)
+    return summary
+
+
+# Spatial-temporal aggregation grid for heatmaps and geographic plots
+GRID_DEGREES = float(os.environ.get("ARGO_GRID_DEGREES", "1.0"))
+GRID_TIME_BIN = os.environ.get("ARGO_GRID_TIME_BIN", "month")  # month, day or none
+GRID_PLOT_MIN_POINTS = 2000
+_grid_cache = LRUCache(32)
+
+
+def _time_bins(data: pd.DataFrame, time_bin: str):
+    """Integer time-bin index per row (months or days since the epoch)"""
+    if time_bin in (None, 'none'):
+        return np.zeros(len(data), dtype='int64')
+    if 'deployment_epoch' in data.columns:
+        times = data['deployment_epoch'].to_numpy().astype('datetime64[s]')
+    elif 'date' in data.columns:
+        times = pd.to_datetime(data['date']).to_numpy().astype('datetime64[s]')
+    else:
+        return np.zeros(len(data), dtype='int64')
+    unit = 'M' if time_bin == 'month' else 'D'
+    return times.astype(f'datetime64[{unit}]').astype('int64')
+
+
+def aggregate_grid(data: pd.DataFrame, degrees: float = GRID_DEGREES, time_bin: str = GRID_TIME_BIN) -> pd.DataFrame:
+    """Bin observations onto a lat/lon(/time) grid with vectorized reductions, cached per frame.
+
+    Returns one row per non-empty cell with the cell-center latitude/longitude, the
+    time bin (months or days since 1970, 0 when time_bin is "none"), the observation
+    count and the mean temperature and salinity of the cell.
+    """
+    if data.empty:
+        return pd.DataFrame(columns=['latitude', 'longitude', 'time_bin', 'count'])
+
+    cache_key = (frame_cache_key(data), degrees, time_bin)
+    cached = _grid_cache.get(cache_key)
+    if cached is not None:
+        return cached
 
+    lat = data['latitude'].to_numpy(dtype='float64')
+    lon = data['longitude'].to_numpy(dtype='float64')
+    valid = np.isfinite(lat) & np.isfinite(lon)
+    n_lat = int(np.ceil(180 / degrees))
+    n_lon = int(np.ceil(360 / degrees))
+    lat_idx = np.clip(np.floor((lat[valid] + 90) / degrees), 0, n_lat - 1).astype('int64')
+    lon_idx = np.floor(((lon[valid] + 180) % 360) / degrees).astype('int64') % n_lon
+    times = _time_bins(data, time_bin)[valid]
 
-def create_graph(query: str, data: pd.DataFrame, ai_response: str = "") -> str:
-    """Create a balanced, clear, and understandable graph based on the query and AI response"""
+    # One flat cell id per observation; np.unique compacts to the occupied cells only
+    time_values, time_idx = np.unique(times, return_inverse=True)
+    cell = (time_idx * n_lat + lat_idx) * n_lon + lon_idx
+    cells, inverse = np.unique(cell, return_inverse=True)
+    counts = np.bincount(inverse, minlength=len(cells))
+
+    cell_time, cell_rest = np.divmod(cells, n_lat * n_lon)
+    cell_lat, cell_lon = np.divmod(cell_rest, n_lon)
+    grid = pd.DataFrame({
+        'latitude': ((cell_lat + 0.5) * degrees - 90).astype('float32'),
+        'longitude': ((cell_lon + 0.5) * degrees - 180).astype('float32'),
+        'time_bin': time_values[cell_time],
+        'count': counts,
+    })
+    for var in ('temperature', 'salinity'):
+        if var not in data.columns:
+            continue
+        values = data[var].to_numpy(dtype='float64')[valid]
+        finite = np.isfinite(values)
+        sums = np.bincount(inverse[finite], weights=values[finite], minlength=len(cells))
+        n = np.bincount(inverse[finite], minlength=len(cells))
+        with np.errstate(invalid='ignore', divide='ignore'):
+            grid[f'{var}_mean'] = (sums / n).astype('float32')
+
+    grid.attrs['degrees'] = degrees
+    _grid_cache.put(cache_key, grid)
+    return grid
+
+
+# Plot-aware downsampling: work per rendered pixel, not per data point
+LINE_MARKER_MAX_POINTS = 200
+SCATTER_DENSITY_MIN_POINTS = 5000
+DENSITY_BIN_PIXELS = 8
+
+
+def _axes_pixel_size(ax, dpi: int):
+    """Width and height of the axes in output pixels"""
+    bbox = ax.get_position()
+    fig_width, fig_height = ax.figure.get_size_inches()
+    return bbox.width * fig_width * dpi, bbox.height * fig_height * dpi
+
+
+def lttb_downsample(x, y, n_out: int) -> np.ndarray:
+    """Largest-Triangle-Three-Buckets: indices of `n_out` points that preserve a line's shape.
+
+    `x` must be sorted. Bucket averages come from cumulative sums, so the per-point work
+    is vectorized and only the bucket loop (n_out iterations) runs in Python.
+    """
+    x = np.asarray(x, dtype='float64')
+    y = np.asarray(y, dtype='float64')
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    edges = np.linspace(1, n - 1, n_out - 1).astype('int64')
+    cum_x = np.concatenate(([0.0], np.cumsum(x)))
+    cum_y = np.concatenate(([0.0], np.cumsum(y)))
+    sizes = np.maximum(edges[1:] - edges[:-1], 1)
+    avg_x = (cum_x[edges[1:]] - cum_x[edges[:-1]]) / sizes
+    avg_y = (cum_y[edges[1:]] - cum_y[edges[:-1]]) / sizes
+    # The bucket after the last one is the final point itself
+    avg_x = np.append(avg_x, x[-1])
+    avg_y = np.append(avg_y, y[-1])
+
+    selected = np.empty(n_out, dtype='int64')
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for b in range(n_out - 2):
+        lo, hi = edges[b], max(edges[b + 1], edges[b] + 1)
+        area = np.abs((x[a] - avg_x[b + 1]) * (y[lo:hi] - y[a])
+                      - (x[a] - x[lo:hi]) * (avg_y[b + 1] - y[a]))
+        a = lo + int(np.argmax(area))
+        selected[b + 1] = a
+    return selected
+
+
+def downsample_line(ax, x, y, dpi: int):
+    """Indices of a line's points reduced to about one per horizontal output pixel"""
+    width_px, _ = _axes_pixel_size(ax, dpi)
+    return lttb_downsample(x, y, max(int(width_px), 3))
+
+
+def scatter_or_density(ax, x, y, c, cmap: str, dpi: int, **scatter_kwargs):
+    """Scatter small data; above SCATTER_DENSITY_MIN_POINTS draw a 2-D histogram instead.
+
+    The histogram's bins are sized to the output pixels and colored by the mean of `c`
+    per bin, so render cost stays flat however many points there are.
+    """
+    x = np.asarray(x, dtype='float64')
+    y = np.asarray(y, dtype='float64')
+    c = np.asarray(c, dtype='float64')
+    if len(x) < SCATTER_DENSITY_MIN_POINTS:
+        return ax.scatter(x, y, c=c, cmap=cmap, **scatter_kwargs)
+
+    finite = np.isfinite(x) & np.isfinite(y) & np.isfinite(c)
+    x, y, c = x[finite], y[finite], c[finite]
+    width_px, height_px = _axes_pixel_size(ax, dpi)
+    bins = (max(20, int(width_px // DENSITY_BIN_PIXELS)), max(20, int(height_px // DENSITY_BIN_PIXELS)))
+    counts, x_edges, y_edges = np.histogram2d(x, y, bins=bins)
+    sums, _, _ = np.histogram2d(x, y, bins=[x_edges, y_edges], weights=c)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        means = np.where(counts > 0, sums / counts, np.nan)
+    return ax.pcolormesh(x_edges, y_edges, means.T, cmap=cmap, shading='flat')
+
+
+def _plot_profile_summary(ax, summary: pd.DataFrame, var: str, color: str):
+    """Plot a mean profile with its 10-90th percentile and ±1 std envelopes"""
+    mean = summary[f'{var}_mean']
+    ax.fill_betweenx(summary['depth'], summary[f'{var}_p10'], summary[f'{var}_p90'],
+                     color=color, alpha=0.15, label='10th-90th percentile')
+    ax.fill_betweenx(summary['depth'], mean - summary[f'{var}_std'], mean + summary[f'{var}_std'],
+                     color=color, alpha=0.25, label='±1 std')
+    ax.plot(mean, summary['depth'], color=color, linewidth=2.5, marker='o', markersize=4,
+            label=f"Mean of {summary.attrs.get('profiles', 0)} profiles")
+    ax.legend(loc='lower right')
+
+
+def create_graph(query: str, data: pd.DataFrame, ai_response: str = "", dpi: int = 300) -> bytes:
+    """Create a balanced, clear, and understandable graph (PNG bytes) based on the query and AI response"""
     
     # Debug: Print data information
     print(f"Creating graph for query: {query}")
@@ -536,37 +2098,33 @@ def create_graph(query: str, data: pd.DataFrame, ai_response: str = "") -> str:
         print(f"Sample data: {data.head()}")
     print(f"AI response: {ai_response[:100]}...")
     
-    # Check if data is empty
-    if data.empty:
-        # Create a simple message plot
-        fig, ax = plt.subplots(figsize=(10, 6))
-        ax.text(0.5, 0.5, 'No data available for visualization', 
-                ha='center', va='center', fontsize=14, 
-                transform=ax.transAxes, color='#666666')
-        ax.set_title('No Data Available', fontsize=16, fontweight='bold', color='#333333')
-        ax.axis('off')
+    # Set up clean, professional styling
+    _ensure_plot_style()
+    
+    # Balanced proportions (16:10) for charts, a smaller canvas for the no-data message
+    with guarded_figure(figsize=(10, 6) if data.empty else (12, 7.5)) as (fig, ax):
+        if data.empty:
+            # Create a simple message plot
+            ax.text(0.5, 0.5, 'No data available for visualization', 
+                    ha='center', va='center', fontsize=14, 
+                    transform=ax.transAxes, color='#666666')
+            ax.set_title('No Data Available', fontsize=16, fontweight='bold', color='#333333')
+            ax.axis('off')
+        else:
+            _draw_graph(fig, ax, query, data, ai_response, dpi)
+            # Improve layout
+            fig.tight_layout()
         
-        # Convert plot to base64 string
+        # Convert plot to PNG bytes with higher quality
         buffer = io.BytesIO()
-        plt.savefig(buffer, format='png', dpi=300, bbox_inches='tight', 
+        fig.savefig(buffer, format='png', dpi=dpi, bbox_inches='tight', 
                     facecolor='white', edgecolor='none')
-        buffer.seek(0)
-        image_base64 = base64.b64encode(buffer.getvalue()).decode()
-        plt.close()
-        return image_base64
-    
-    # Set up clean, professional styling
-    plt.style.use('default')  # Use default style for better control
-    plt.rcParams['font.size'] = 10
-    plt.rcParams['axes.titlesize'] = 14
-    plt.rcParams['axes.labelsize'] = 11
-    plt.rcParams['xtick.labelsize'] = 9
-    plt.rcParams['ytick.labelsize'] = 9
-    plt.rcParams['legend.fontsize'] = 9
-    
-    # Create figure with balanced proportions (16:10 ratio)
-    fig, ax = plt.subplots(figsize=(12, 7.5))
     
+    return buffer.getvalue()
+
+
+def _draw_graph(fig, ax, query: str, data: pd.DataFrame, ai_response: str, dpi: int):
+    """Draw the chart the query asks for onto ax"""
     query_lower = query.lower()
     
     # Function to generate dynamic titles based on user query
@@ -674,18 +2232,32 @@ def create_graph(query: str, data: pd.DataFrame, ai_response: str = "") -> str:
     # Determine graph type based on query with improved balance
     if 'temperature' in query_lower and 'depth' in query_lower:
         # Temperature vs Depth profile - more balanced
+        summary = profile_summary(data)
         clean_data = clean_and_scale_data(data, 'temperature', 'depth')
         
-        if not clean_data.empty:
+        if summary is not None and 'temperature_mean' in summary.columns:
+            # Many floats: interpolated mean profile with spread instead of raw points
+            _plot_profile_summary(ax, summary, 'temperature', '#1f77b4')
+            ax.set_xlabel('Temperature (°C)', fontsize=11, fontweight='bold')
+            ax.set_ylabel('Depth (m)', fontsize=11, fontweight='bold')
+            ax.set_title(generate_dynamic_title(query, 'temperature_depth'), fontsize=14, fontweight='bold', pad=15)
+            ax.invert_yaxis()  # Invert y-axis for depth (surface at top)
+            ax.grid(True, alpha=0.3, linestyle='-', linewidth=0.5)
+        
+        elif not clean_data.empty:
+            shown = clean_data.iloc[downsample_line(ax, clean_data['temperature'], clean_data['depth'], dpi)]
+            markers = len(shown) <= LINE_MARKER_MAX_POINTS
+            
             # Use line plot for better readability
-            ax.plot(clean_data['temperature'], clean_data['depth'], 
-                   marker='o', linewidth=2.5, markersize=6, 
+            ax.plot(shown['temperature'], shown['depth'], 
+                   marker='o' if markers else None, linewidth=2.5, markersize=6, 
                    color='#1f77b4', alpha=0.8, markerfacecolor='white', 
                    markeredgewidth=1.5, markeredgecolor='#1f77b4')
             
             # Add data points as scatter for emphasis
-            ax.scatter(clean_data['temperature'], clean_data['depth'], 
-                      s=40, alpha=0.6, color='#1f77b4', edgecolors='white', linewidth=1)
+            if markers:
+                ax.scatter(shown['temperature'], shown['depth'], 
+                          s=40, alpha=0.6, color='#1f77b4', edgecolors='white', linewidth=1)
             
             # Generate dynamic title
             title = generate_dynamic_title(query, 'temperature_depth')
@@ -708,10 +2280,18 @@ def create_graph(query: str, data: pd.DataFrame, ai_response: str = "") -> str:
                            clean_data['depth'].min() - depth_range*0.05)
         
     elif 'salinity' in query_lower and 'depth' in query_lower:
-        # Beautiful Salinity vs Depth profile
-        scatter = ax.scatter(data['salinity'], data['depth'], 
-                           c=data['salinity'], cmap='Blues', 
-                           s=60, alpha=0.8, edgecolors='white', linewidth=0.5)
+        summary = profile_summary(data)
+        if summary is not None and 'salinity_mean' in summary.columns:
+            # Many floats: interpolated mean profile with spread instead of raw points
+            _plot_profile_summary(ax, summary, 'salinity', '#08519c')
+        else:
+            # Beautiful Salinity vs Depth profile
+            scatter = scatter_or_density(ax, data['salinity'], data['depth'], 
+                                         data['salinity'], 'Blues', dpi, 
+                                         s=60, alpha=0.8, edgecolors='white', linewidth=0.5)
+            
+            cbar = fig.colorbar(scatter, ax=ax)
+            cbar.set_label('Salinity (PSU)', fontweight='bold')
         
         ax.set_xlabel('Salinity (PSU)', fontsize=12, fontweight='bold')
         ax.set_ylabel('Depth (m)', fontsize=12, fontweight='bold')
@@ -719,39 +2299,48 @@ def create_graph(query: str, data: pd.DataFrame, ai_response: str = "") -> str:
         ax.invert_yaxis()
         ax.grid(True, alpha=0.3)
         
-        cbar = plt.colorbar(scatter, ax=ax)
-        cbar.set_label('Salinity (PSU)', fontweight='bold')
-        
     elif 'temperature' in query_lower and 'salinity' in query_lower:
         # Beautiful T-S diagram
-        scatter = ax.scatter(data['salinity'], data['temperature'], 
-                           c=data['depth'], cmap='viridis', 
-                           s=80, alpha=0.8, edgecolors='white', linewidth=0.5)
+        scatter = scatter_or_density(ax, data['salinity'], data['temperature'], 
+                                     data['depth'], 'viridis', dpi, 
+                                     s=80, alpha=0.8, edgecolors='white', linewidth=0.5)
         
         ax.set_xlabel('Salinity (PSU)', fontsize=12, fontweight='bold')
         ax.set_ylabel('Temperature (°C)', fontsize=12, fontweight='bold')
         ax.set_title('Temperature-Salinity Diagram', fontsize=16, fontweight='bold', pad=20)
         ax.grid(True, alpha=0.3)
         
-        cbar = plt.colorbar(scatter, ax=ax)
+        cbar = fig.colorbar(scatter, ax=ax)
         cbar.set_label('Depth (m)', fontweight='bold')
         
     elif 'time' in query_lower or 'trend' in query_lower:
         # Beautiful time series
-        ax.plot(data['date'], data['temperature'], marker='o', linewidth=3, 
+        if 'date' not in data.columns and 'deployment_epoch' in data.columns:
+            # Compact snapshot frames carry their timestamps as epoch seconds
+            data = data.assign(date=pd.to_datetime(data['deployment_epoch'], unit='s'))
+        series = data.dropna(subset=['date', 'temperature']).sort_values('date')
+        x_numeric = series['date'].to_numpy().astype('datetime64[s]').astype('float64')
+        shown = series.iloc[downsample_line(ax, x_numeric, series['temperature'], dpi)]
+        ax.plot(shown['date'], shown['temperature'], 
+               marker='o' if len(shown) <= LINE_MARKER_MAX_POINTS else None, linewidth=3, 
                markersize=6, color='#2E86AB', alpha=0.8)
         
-        # Add trend line
-        x_numeric = np.arange(len(data['date']))
-        z = np.polyfit(x_numeric, data['temperature'], 1)
-        p = np.poly1d(z)
-        ax.plot(data['date'], p(x_numeric), "r--", alpha=0.8, linewidth=2)
+        # Add trend line, fitted on per-pixel bucket means rather than every point
+        if len(series) >= 2:
+            buckets = np.minimum((np.arange(len(series)) * len(shown)) // len(series), len(shown) - 1)
+            counts = np.bincount(buckets)
+            bucket_x = np.bincount(buckets, weights=x_numeric) / counts
+            bucket_y = np.bincount(buckets, weights=series['temperature'].to_numpy(dtype='float64')) / counts
+            z = np.polyfit(bucket_x, bucket_y, 1, w=np.sqrt(counts))
+            p = np.poly1d(z)
+            ends = x_numeric[[0, -1]]
+            ax.plot(series['date'].iloc[[0, -1]], p(ends), "r--", alpha=0.8, linewidth=2)
         
         ax.set_xlabel('Date', fontsize=12, fontweight='bold')
         ax.set_ylabel('Temperature (°C)', fontsize=12, fontweight='bold')
         ax.set_title('Temperature Trends Over Time', fontsize=16, fontweight='bold', pad=20)
         ax.grid(True, alpha=0.3)
-        plt.xticks(rotation=45)
+        ax.tick_params(axis='x', labelrotation=45)
         
     elif 'distribution' in query_lower or 'histogram' in query_lower:
         # Beautiful histogram
@@ -768,22 +2357,39 @@ def create_graph(query: str, data: pd.DataFrame, ai_response: str = "") -> str:
         ax.grid(True, alpha=0.3)
         
     elif 'map' in query_lower or 'location' in query_lower:
-        # Beautiful geographic plot
-        scatter = ax.scatter(data['longitude'], data['latitude'], 
-                           c=data['temperature'], cmap='coolwarm', 
-                           s=100, alpha=0.8, edgecolors='white', linewidth=0.5)
+        if len(data) >= GRID_PLOT_MIN_POINTS:
+            # Large snapshots: mean temperature per grid cell instead of every raw point
+            grid = aggregate_grid(data, time_bin='none').dropna(subset=['temperature_mean'])
+            degrees = grid.attrs['degrees']
+            n_lat, n_lon = int(np.ceil(180 / degrees)), int(np.ceil(360 / degrees))
+            raster = np.full((n_lat, n_lon), np.nan, dtype='float32')
+            rows = ((grid['latitude'].to_numpy() + 90) / degrees).astype('int64')
+            cols = ((grid['longitude'].to_numpy() + 180) / degrees).astype('int64')
+            raster[rows, cols] = grid['temperature_mean'].to_numpy()
+            scatter = ax.imshow(raster, origin='lower', extent=(-180, -180 + n_lon * degrees, -90, -90 + n_lat * degrees),
+                                cmap='coolwarm', aspect='auto', interpolation='nearest')
+            ax.set_xlim(grid['longitude'].min() - degrees, grid['longitude'].max() + degrees)
+            ax.set_ylim(grid['latitude'].min() - degrees, grid['latitude'].max() + degrees)
+        else:
+            # Beautiful geographic plot
+            scatter = ax.scatter(data['longitude'], data['latitude'], 
+                               c=data['temperature'], cmap='coolwarm', 
+                               s=100, alpha=0.8, edgecolors='white', linewidth=0.5)
         
         ax.set_xlabel('Longitude', fontsize=12, fontweight='bold')
         ax.set_ylabel('Latitude', fontsize=12, fontweight='bold')
         ax.set_title('Ocean Temperature Map', fontsize=16, fontweight='bold', pad=20)
         ax.grid(True, alpha=0.3)
         
-        cbar = plt.colorbar(scatter, ax=ax)
+        cbar = fig.colorbar(scatter, ax=ax)
         cbar.set_label('Temperature (°C)', fontweight='bold')
         
     else:
         # Beautiful default temperature profile
-        ax.plot(data['depth'], data['temperature'], marker='o', linewidth=3, 
+        profile = data.dropna(subset=['depth', 'temperature']).sort_values('depth')
+        shown = profile.iloc[downsample_line(ax, profile['depth'], profile['temperature'], dpi)]
+        ax.plot(shown['depth'], shown['temperature'], 
+               marker='o' if len(shown) <= LINE_MARKER_MAX_POINTS else None, linewidth=3, 
                markersize=8, color='#E63946', alpha=0.8, markerfacecolor='white', 
                markeredgewidth=2, markeredgecolor='#E63946')
         
@@ -795,55 +2401,38 @@ def create_graph(query: str, data: pd.DataFrame, ai_response: str = "") -> str:
     
     # Add subtle background
     ax.set_facecolor('#f8f9fa')
-    
-    # Improve layout
-    plt.tight_layout()
-    
-    # Convert plot to base64 string with higher quality
-    buffer = io.BytesIO()
-    plt.savefig(buffer, format='png', dpi=300, bbox_inches='tight', 
-                facecolor='white', edgecolor='none')
-    buffer.seek(0)
-    image_base64 = base64.b64encode(buffer.getvalue()).decode()
-    plt.close()
-    
-    return image_base64
 
 
-def extract_location_data_from_response(ai_response: str, query: str) -> pd.DataFrame:
+def extract_location_data_from_response(ai_response: str, query: str, deadline: Deadline = None) -> pd.DataFrame:
     """Extract location data from AI response for ARGO float mapping using real-time data"""
     
     # Determine region from AI response
-    region = None
-    if 'pacific' in ai_response.lower():
-        region = 'pacific'
-    elif 'atlantic' in ai_response.lower():
-        region = 'atlantic'
-    elif 'indian' in ai_response.lower():
-        region = 'indian'
-    elif 'arctic' in ai_response.lower():
-        region = 'arctic'
-    elif 'southern' in ai_response.lower():
-        region = 'southern'
+    region = detect_region(ai_response)
     
     # Try to fetch real-time ARGO float locations first
     try:
-        real_locations = fetch_argo_float_locations(region=region)
+        real_locations = fetch_argo_float_locations(region=region, deadline=deadline)
         if not real_locations.empty:
             return real_locations
     except Exception as e:
         print(f"Real-time location fetch failed: {e}")
     
     # Fallback to enhanced sample data based on AI response
-    np.random.seed(42)  # For reproducible results
+    rng = np.random.default_rng(42)  # Reproducible without touching the global RNG
     
-    # Extract coordinates from AI response with more comprehensive patterns
-    lat_matches = re.findall(r'latitude[:\s]*(-?\d+\.?\d*)', ai_response.lower())
-    lon_matches = re.findall(r'longitude[:\s]*(-?\d+\.?\d*)', ai_response.lower())
+    # Coordinates requested in the structured CSV format
+    structured = parse_structured_data(ai_response, LOCATION_DATA_COLUMNS).dropna(subset=['latitude', 'longitude'])
     
-    # Also look for coordinate patterns like "40.5°N, 120.3°W"
-    coord_pattern = r'(-?\d+\.?\d*)[°\s]*[NS]?[,\s]+(-?\d+\.?\d*)[°\s]*[EW]?'
-    coord_matches = re.findall(coord_pattern, ai_response)
+    # Regex extraction is only a fallback for responses not in the structured format
+    lat_matches, lon_matches, coord_matches = [], [], []
+    if structured.empty:
+        # Extract coordinates from AI response with more comprehensive patterns
+        lat_matches = re.findall(r'latitude[:\s]*(-?\d+\.?\d*)', ai_response.lower())
+        lon_matches = re.findall(r'longitude[:\s]*(-?\d+\.?\d*)', ai_response.lower())
+        
+        # Also look for coordinate patterns like "40.5°N, 120.3°W"
+        coord_pattern = r'(-?\d+\.?\d*)[°\s]*[NS]?[,\s]+(-?\d+\.?\d*)[°\s]*[EW]?'
+        coord_matches = re.findall(coord_pattern, ai_response)
     
     # Extract specific ocean regions and locations mentioned
     locations = []
@@ -893,7 +2482,7 @@ def extract_location_data_from_response(ai_response: str, query: str) -> pd.Data
         locations.extend([(50, 0), (45, 5), (55, -5)])
     
     # Use extracted coordinates from AI response
-    extracted_coords = []
+    extracted_coords = list(zip(structured['latitude'], structured['longitude']))
     if lat_matches and lon_matches and len(lat_matches) == len(lon_matches):
         for lat, lon in zip(lat_matches, lon_matches):
             extracted_coords.append((float(lat), float(lon)))
@@ -911,8 +2500,8 @@ def extract_location_data_from_response(ai_response: str, query: str) -> pd.Data
         for base_lat, base_lon in extracted_coords:
             # Generate points around each extracted location
             n_around = max(3, n_points // len(extracted_coords))
-            lats = np.random.normal(base_lat, 2, n_around)
-            lons = np.random.normal(base_lon, 2, n_around)
+            lats = rng.normal(base_lat, 2, n_around)
+            lons = rng.normal(base_lon, 2, n_around)
             final_lats.extend(lats)
             final_lons.extend(lons)
         
@@ -923,39 +2512,398 @@ def extract_location_data_from_response(ai_response: str, query: str) -> pd.Data
         # Use mentioned ocean regions
         n_points = 30
         all_lats, all_lons = zip(*locations)
-        lats = np.random.choice(all_lats, n_points) + np.random.normal(0, 2, n_points)
-        lons = np.random.choice(all_lons, n_points) + np.random.normal(0, 2, n_points)
+        lats = rng.choice(np.array(all_lats), n_points) + rng.normal(0, 2, n_points)
+        lons = rng.choice(np.array(all_lons), n_points) + rng.normal(0, 2, n_points)
         
     else:
         # Generate global ARGO float distribution
         n_points = 50
-        lats = np.random.uniform(-60, 60, n_points)
-        lons = np.random.uniform(-180, 180, n_points)
+        lats = rng.uniform(-60, 60, n_points)
+        lons = rng.uniform(-180, 180, n_points)
     
     # Create realistic ARGO float data with ocean-appropriate properties
     data = {
         'latitude': lats,
         'longitude': lons,
         'float_id': [f'ARGO_{i:06d}' for i in range(len(lats))],
-        'deployment_date': pd.date_range('2020-01-01', periods=len(lats), freq='30D'),
-        'temperature': np.random.normal(15, 10, len(lats)),
-        'salinity': np.random.normal(35, 2, len(lats)),
-        'depth': np.random.uniform(0, 2000, len(lats)),
-        'status': np.random.choice(['active', 'drifting', 'parked'], len(lats), p=[0.6, 0.3, 0.1])
+        'deployment_epoch': epoch_seconds(pd.date_range('2020-01-01', periods=len(lats), freq='30D')),
+        'temperature': rng.normal(15, 10, len(lats)),
+        'salinity': rng.normal(35, 2, len(lats)),
+        'depth': rng.uniform(0, 2000, len(lats)),
+        'status': rng.choice(['active', 'drifting', 'parked'], len(lats), p=[0.6, 0.3, 0.1])
     }
     
-    return pd.DataFrame(data)
+    return to_compact_frame(pd.DataFrame(data))
+
+
+# Pre-rendered global float-density tile pyramid (XYZ PNG tiles)
+TILE_DIR = os.environ.get("ARGO_TILE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "tiles"))
+TILE_MAX_ZOOM = int(os.environ.get("ARGO_TILE_MAX_ZOOM", "6"))
+TILE_SIZE = 256
+TILE_BLUR_RADIUS = 2
+MAP_MARKER_LIMIT = 500
+_tile_state = {'current': None, 'built_at': None, 'build_seconds': None, 'tiles': 0}
+_tile_build_lock = threading.Lock()
 
 
-def create_map(query: str, data: pd.DataFrame, ai_response: str = "") -> str:
+def _mercator_pixels(lat, lon, zoom: int):
+    """Global Web Mercator pixel coordinates of each point at a zoom level"""
+    world = TILE_SIZE << zoom
+    lat = np.radians(np.clip(lat, -85.0511, 85.0511))
+    px = (lon + 180.0) / 360.0 * world
+    py = (1.0 - np.arcsinh(np.tan(lat)) / np.pi) / 2.0 * world
+    return (np.clip(px, 0, world - 1).astype('int64'), np.clip(py, 0, world - 1).astype('int64'))
+
+
+def _box_blur(image, radius: int):
+    """Separable box blur via cumulative sums"""
+    size = 2 * radius + 1
+    for axis in (0, 1):
+        padded = np.pad(image, [(radius + 1, radius) if a == axis else (0, 0) for a in (0, 1)])
+        cumsum = np.cumsum(padded, axis=axis)
+        image = (np.take(cumsum, np.arange(size, cumsum.shape[axis]), axis=axis)
+                 - np.take(cumsum, np.arange(0, cumsum.shape[axis] - size), axis=axis)) / size
+    return image
+
+
+def build_density_tiles(data: pd.DataFrame, out_dir: str, max_zoom: int = TILE_MAX_ZOOM) -> int:
+    """Render float density into `out_dir/{z}/{x}/{y}.png` for zooms 0..max_zoom.
+
+    Each tile histograms the points in its window plus a margin taken from neighbouring
+    tiles, so the blur has no seams. Only tiles that contain floats are written.
+    Returns the number of tiles written.
+    """
+    lat = data['latitude'].to_numpy(dtype='float64')
+    lon = data['longitude'].to_numpy(dtype='float64')
+    finite = np.isfinite(lat) & np.isfinite(lon)
+    lat, lon = lat[finite], lon[finite]
+    if len(lat) == 0:
+        return 0
+
+    from PIL import Image
+
+    # Palette PNGs: intensity byte -> inferno color, with alpha growing with density
+    levels = np.linspace(0, 1, 256)
+    palette = (plt.get_cmap('inferno')(levels)[:, :3] * 255).astype('uint8').tobytes()
+    alpha = (np.sqrt(levels) * 220).astype('uint8').tobytes()
+    margin = 2 * TILE_BLUR_RADIUS
+    window = TILE_SIZE + 2 * margin
+    written = 0
+    for zoom in range(max_zoom + 1):
+        n_tiles = 1 << zoom
+        px, py = _mercator_pixels(lat, lon, zoom)
+
+        # Normalize against the densest pixel of this zoom so colors are consistent across tiles
+        _, pixel_counts = np.unique(px * (TILE_SIZE << zoom) + py, return_counts=True)
+        scale = np.log1p(pixel_counts.max())
+
+        # Assign each point to its own tile and to neighbours whose margin it falls into
+        tile_ids, local_x, local_y = [], [], []
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                tx = px // TILE_SIZE + dx
+                ty = py // TILE_SIZE + dy
+                lx = px - tx * TILE_SIZE + margin
+                ly = py - ty * TILE_SIZE + margin
+                keep = ((tx >= 0) & (tx < n_tiles) & (ty >= 0) & (ty < n_tiles)
+                        & (lx >= 0) & (lx < window) & (ly >= 0) & (ly < window))
+                tile_ids.append(tx[keep] * n_tiles + ty[keep])
+                local_x.append(lx[keep])
+                local_y.append(ly[keep])
+        tile_ids = np.concatenate(tile_ids)
+        local = np.concatenate(local_y) * window + np.concatenate(local_x)
+        order = np.argsort(tile_ids, kind='stable')
+        tile_ids, local = tile_ids[order], local[order]
+        tiles, starts = np.unique(tile_ids, return_index=True)
+        stops = np.append(starts[1:], len(tile_ids))
+
+        for tile, start, stop in zip(tiles, starts, stops):
+            counts = np.bincount(local[start:stop], minlength=window * window).reshape(window, window)
+            density = _box_blur(counts.astype('float32'), TILE_BLUR_RADIUS)[margin:-margin, margin:-margin]
+            intensity = np.clip(np.log1p(density * (2 * TILE_BLUR_RADIUS + 1) ** 2) / scale, 0, 1)
+            if not intensity.any():
+                continue
+            image = Image.fromarray((intensity * 255).astype('uint8'))
+            image.putpalette(palette)
+            tx, ty = divmod(int(tile), n_tiles)
+            tile_dir = os.path.join(out_dir, str(zoom), str(tx))
+            os.makedirs(tile_dir, exist_ok=True)
+            image.save(os.path.join(tile_dir, f"{ty}.png"), transparency=alpha, compress_level=1)
+            written += 1
+    return written
+
+
+def _adopt_density_tiles(snapshot_id: str) -> bool:
+    """Serve a pyramid another process (or an earlier run) already built for this snapshot"""
+    final_dir = os.path.join(TILE_DIR, snapshot_id)
+    if not os.path.isdir(final_dir):
+        return False
+    _tile_state.update(current=snapshot_id, built_at=os.path.getmtime(final_dir))
+    return True
+
+
+def refresh_density_tiles(data: pd.DataFrame):
+    """Build the tile pyramid for a snapshot and swap it in; skipped if a build is running.
+
+    Workers following the snapshot leader only adopt the pyramid the leader builds
+    (density_tile_url picks it up once it exists) instead of rendering their own.
+    """
+    if not _tile_build_lock.acquire(blocking=False):
+        return
+    try:
+        started = time.perf_counter()
+        snapshot_id = frame_cache_key(data)[:16]
+        if snapshot_id == _tile_state['current'] or _adopt_density_tiles(snapshot_id):
+            return
+        if not snapshot_refresher.is_leader():
+            return
+        final_dir = os.path.join(TILE_DIR, snapshot_id)
+        build_dir = os.path.join(TILE_DIR, f".building-{snapshot_id}-{os.getpid()}")
+        shutil.rmtree(build_dir, ignore_errors=True)
+        written = build_density_tiles(data, build_dir)
+        try:
+            os.replace(build_dir, final_dir)
+        except OSError:
+            if not os.path.isdir(final_dir):
+                raise
+            shutil.rmtree(build_dir, ignore_errors=True)  # Another process swapped in the same pyramid
+
+        previous = _tile_state['current']
+        _tile_state.update(current=snapshot_id, built_at=time.time(),
+                           build_seconds=round(time.perf_counter() - started, 3), tiles=written)
+        # Keep the previous pyramid for clients still viewing it, drop anything older
+        for name in os.listdir(TILE_DIR):
+            if name not in (snapshot_id, previous) and not name.startswith('.'):
+                shutil.rmtree(os.path.join(TILE_DIR, name), ignore_errors=True)
+        print(f"Built {written} density tiles for snapshot {snapshot_id} in {_tile_state['build_seconds']}s")
+    except Exception as e:
+        print(f"Density tile build failed: {e}")
+    finally:
+        _tile_build_lock.release()
+
+
+@on_snapshot_refresh
+def _schedule_tile_build(kind, region, df):
+    if kind == 'locations' and region is None and not df.empty:
+        threading.Thread(target=refresh_density_tiles, args=(df,), daemon=True).start()
+
+
+def public_url(path: str) -> str:
+    """Absolute URL of a backend path, as seen by the browser"""
+    base = os.environ.get("ARGO_PUBLIC_URL") or (request.host_url if has_request_context() else "")
+    return f"{base.rstrip('/')}/{path.lstrip('/')}"
+
+
+def _follow_density_tiles(snapshot_id: str):
+    """Switch to the pyramid of this snapshot once it exists; until then keep the current
+    one, or take the newest on disk if there is none (or it was swept)"""
+    current = _tile_state['current']
+    if snapshot_id == current or _adopt_density_tiles(snapshot_id):
+        return
+    if current and os.path.isdir(os.path.join(TILE_DIR, current)):
+        return
+    try:
+        pyramids = [entry for entry in os.scandir(TILE_DIR) if entry.is_dir() and not entry.name.startswith('.')]
+    except FileNotFoundError:
+        return
+    if pyramids:
+        _adopt_density_tiles(max(pyramids, key=lambda entry: entry.stat().st_mtime).name)
+
+
+def density_tile_url():
+    """URL template of the current tile pyramid, or None if none has been built yet"""
+    snapshot = snapshot_store.get('locations', None)
+    if snapshot is not None:
+        _follow_density_tiles(frame_cache_key(snapshot.frame)[:16])
+    if not _tile_state['current']:
+        return None
+    return public_url(f"tiles/{_tile_state['current']}/{{z}}/{{x}}/{{y}}.png")
+
+
+ARTIFACT_DIR = os.environ.get("ARGO_ARTIFACT_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), 'artifacts'))
+ARTIFACT_HOT_BYTES = int(os.environ.get("ARGO_ARTIFACT_HOT_BYTES", str(64 * 1024 * 1024)))
+ARTIFACT_DISK_BYTES = int(os.environ.get("ARGO_ARTIFACT_DISK_BYTES", str(1024 * 1024 * 1024)))
+ARTIFACT_RESCAN_SECONDS = 60
+ARTIFACT_TYPES = {'png': 'image/png', 'html': 'text/html; charset=utf-8'}
+_ARTIFACT_NAME = re.compile(r'^[0-9a-f]{64}\.(png|html)$')
+
+
+class ArtifactStore:
+    """Content-addressed store for rendered charts and maps.
+
+    Artifacts are named `<sha256>.<ext>` and written once to disk (sharded by the
+    first two hex digits); recently used ones are also kept in a byte-bounded
+    in-memory LRU so hot artifacts are served without touching the disk. Since a
+    name can only ever refer to the same bytes, responses are cacheable forever.
+
+    The disk tier is bounded too: once the directory (shared by all workers, so it is
+    rescanned every ARTIFACT_RESCAN_SECONDS) outgrows `disk_bytes`, the least recently
+    written or served files are deleted down to 90% of the cap. A URL whose file was
+    swept answers 404, so the cap should hold well more than a session's artifacts.
+    """
+
+    def __init__(self, root: str, hot_bytes: int, disk_bytes: int = 0):
+        self.root = root
+        self.hot_bytes = hot_bytes
+        self.disk_bytes = disk_bytes
+        self._hot = OrderedDict()
+        self._hot_size = 0
+        self._disk_size = 0
+        self._disk_files = 0
+        self._scanned_at = float('-inf')
+        self._lock = threading.Lock()
+        self._sweep_lock = threading.Lock()
+        self._stats = {'puts': 0, 'hot_hits': 0, 'disk_hits': 0, 'misses': 0, 'swept': 0}
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.root, name[:2], name)
+
+    def _remember(self, name: str, data: bytes):
+        with self._lock:
+            if name in self._hot:
+                self._hot.move_to_end(name)
+                return
+            if len(data) > self.hot_bytes:
+                return
+            self._hot[name] = data
+            self._hot_size += len(data)
+            while self._hot_size > self.hot_bytes:
+                _, evicted = self._hot.popitem(last=False)
+                self._hot_size -= len(evicted)
+
+    def _scan(self) -> list:
+        """(mtime, size, path) of every artifact on disk"""
+        files = []
+        try:
+            shards = [entry.path for entry in os.scandir(self.root) if entry.is_dir()]
+        except FileNotFoundError:
+            return files
+        for shard in shards:
+            try:
+                for entry in os.scandir(shard):
+                    if _ARTIFACT_NAME.match(entry.name):
+                        stat = entry.stat()
+                        files.append((stat.st_mtime, stat.st_size, entry.path))
+            except FileNotFoundError:
+                continue
+        return files
+
+    def _sweep(self):
+        """Recount the disk tier and delete the least recently used files over the cap"""
+        files = self._scan()
+        total = sum(size for _, size, _ in files)
+        swept = 0
+        if self.disk_bytes > 0 and total > self.disk_bytes:
+            for _, size, path in sorted(files):
+                if total <= 0.9 * self.disk_bytes:
+                    break
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass  # swept by another worker
+                total -= size
+                swept += 1
+        with self._lock:
+            self._disk_size = total
+            self._disk_files = len(files) - swept
+            self._scanned_at = time.monotonic()
+            self._stats['swept'] += swept
+
+    def _track_disk(self, added: int):
+        with self._lock:
+            self._disk_size += added
+            self._disk_files += 1 if added else 0
+            due = (time.monotonic() - self._scanned_at > ARTIFACT_RESCAN_SECONDS
+                   or 0 < self.disk_bytes < self._disk_size)
+        if due and self._sweep_lock.acquire(blocking=False):
+            try:
+                self._sweep()
+            except Exception as e:
+                print(f"Artifact sweep failed: {e}")
+            finally:
+                self._sweep_lock.release()
+
+    @staticmethod
+    def _touch(path: str):
+        try:
+            os.utime(path)  # mtime marks recent use; atime is often not updated
+        except OSError:
+            pass
+
+    def put(self, data: bytes, ext: str) -> str:
+        """Store the bytes and return the artifact name"""
+        name = f"{hashlib.sha256(data).hexdigest()}.{ext}"
+        path = self._path(name)
+        added = 0
+        if os.path.exists(path):
+            self._touch(path)
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+            added = len(data)
+        self._remember(name, data)
+        self._stats['puts'] += 1
+        self._track_disk(added)
+        return name
+
+    def get(self, name: str):
+        with self._lock:
+            data = self._hot.get(name)
+            if data is not None:
+                self._hot.move_to_end(name)
+                self._stats['hot_hits'] += 1
+                return data
+        path = self._path(name)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+        except FileNotFoundError:
+            self._stats['misses'] += 1
+            return None
+        self._touch(path)
+        self._stats['disk_hits'] += 1
+        self._remember(name, data)
+        return data
+
+    def metrics(self) -> dict:
+        if self._scanned_at == float('-inf'):
+            self._track_disk(0)  # count what earlier runs and other workers left on disk
+        with self._lock:
+            return {'hot_items': len(self._hot), 'hot_bytes': self._hot_size,
+                    'disk_items': self._disk_files, 'disk_bytes': self._disk_size,
+                    'disk_limit_bytes': self.disk_bytes, **self._stats}
+
+
+artifact_store = ArtifactStore(ARTIFACT_DIR, ARTIFACT_HOT_BYTES, ARTIFACT_DISK_BYTES)
+
+
+def artifact_url(data, ext: str) -> str:
+    """Store a rendered chart (PNG bytes) or map (HTML) and return the URL it is served at"""
+    if isinstance(data, str):
+        data = data.encode('utf-8')
+    return public_url(f"artifacts/{artifact_store.put(data, ext)}")
+
+
+def create_map(query: str, data: pd.DataFrame, ai_response: str = "", max_markers: int = None) -> str:
     """Create a beautiful interactive map for ARGO float locations"""
     
     # Create base map
     center_lat = data['latitude'].mean()
     center_lon = data['longitude'].mean()
     
+    # Global views use the pre-rendered density tiles when they exist
+    is_global = 'ocean' in query.lower() or 'global' in query.lower()
+    tile_url = density_tile_url() if is_global else None
+    if tile_url:
+        max_markers = min(max_markers or MAP_MARKER_LIMIT, MAP_MARKER_LIMIT)
+    if max_markers and len(data) > max_markers:
+        data = data.sample(max_markers, random_state=0)
+    
     # Choose map style based on query
-    if 'ocean' in query.lower() or 'global' in query.lower():
+    if is_global:
         m = folium.Map(
             location=[center_lat, center_lon],
             zoom_start=3,
@@ -1007,13 +2955,13 @@ def create_map(query: str, data: pd.DataFrame, ai_response: str = "") -> str:
         temp = row.get('temperature', 0)
         sal = row.get('salinity', 0)
         depth = row.get('depth', 0)
-        deploy_date = row.get('deployment_date', datetime.now())
+        deploy_epoch = row.get('deployment_epoch')
         
         # Format deployment date safely
-        if hasattr(deploy_date, 'strftime'):
-            deploy_str = deploy_date.strftime('%Y-%m-%d')
+        if pd.notna(deploy_epoch):
+            deploy_str = datetime.fromtimestamp(int(deploy_epoch), timezone.utc).strftime('%Y-%m-%d')
         else:
-            deploy_str = str(deploy_date)
+            deploy_str = datetime.now().strftime('%Y-%m-%d')
         
         popup_content = f"""
         <div style="width: 200px;">
@@ -1038,9 +2986,21 @@ def create_map(query: str, data: pd.DataFrame, ai_response: str = "") -> str:
             fillOpacity=0.8
         ).add_to(m)
     
-    # Add heatmap layer for density
-    heat_data = [[row['latitude'], row['longitude']] for idx, row in data.iterrows()]
-    plugins.HeatMap(heat_data, name='ARGO Float Density').add_to(m)
+    if tile_url:
+        # Density layer from the static tile pyramid: no per-request computation
+        folium.TileLayer(
+            tiles=tile_url,
+            name='ARGO Float Density',
+            attr='ARGO float density',
+            overlay=True,
+            max_native_zoom=TILE_MAX_ZOOM,
+            opacity=0.8
+        ).add_to(m)
+    else:
+        # Add heatmap layer for density from per-cell counts instead of raw coordinates
+        grid = aggregate_grid(data, time_bin='none')
+        heat_data = grid[['latitude', 'longitude', 'count']].to_numpy().tolist()
+        plugins.HeatMap(heat_data, name='ARGO Float Density').add_to(m)
     
     # Add layer control
     folium.LayerControl().add_to(m)
@@ -1065,118 +3025,892 @@ def create_map(query: str, data: pd.DataFrame, ai_response: str = "") -> str:
     '''
     m.get_root().html.add_child(folium.Element(title_html))
     
-    # Convert map to HTML string
-    map_html = m._repr_html_()
+    # Render the map as a standalone HTML document (served as an artifact inside an iframe)
+    return m.get_root().render()
+
+
+def warm_up():
+    """Import heavy modules, build plot styles and exercise the render paths once.
+
+    Meant for the master process of a pre-forking server (e.g. gunicorn --preload)
+    so every forked worker starts with the libraries loaded and the paths warm. It
+    neither fetches data nor starts threads: a thread holding a lock at fork time
+    would leave that lock held forever in the children. Canned chart and map answers
+    are rendered from the snapshots restored at import; each worker builds the rest
+    (canned_responses.start).
+    """
+    started = time.perf_counter()
+    for module in (np, pd, plt, folium, plugins, requests):
+        module._load()
+    import openai  # noqa: F401  (imported lazily by create_client)
+
+    _ensure_plot_style()
+    sample = generate_sample_data("warm-up")
+    create_graph("temperature vs depth", sample.head(10))
+    create_map("global map", sample.head(10))
+    canned_responses.prebuild()
+
+    STARTUP_METRICS['warmup_seconds'] = round(time.perf_counter() - started, 4)
+    STARTUP_METRICS['ready_seconds'] = round(time.perf_counter() - _IMPORT_STARTED, 4)
+    print(f"Warm-up finished in {STARTUP_METRICS['warmup_seconds']}s "
+          f"(ready {STARTUP_METRICS['ready_seconds']}s after import)")
+
+
+# Progressive rendering for streamed graph requests
+GRAPH_PREVIEW_MIN_POINTS = int(os.environ.get("ARGO_GRAPH_PREVIEW_MIN_POINTS", "10"))
+GRAPH_PREVIEW_DPI = 100
+
+
+SESSION_LIMIT = int(os.environ.get("ARGO_SESSION_LIMIT", "256"))
+SESSION_TTL = float(os.environ.get("ARGO_SESSION_TTL_SECONDS", "1800"))
+FOLLOW_UP_CUES = re.compile(r'\b(now|same|instead|also|again|too|as well|that data|those)\b')
+REQUESTED_VARIABLES = {
+    'temperature': re.compile(r'\btemp(erature)?s?\b'),
+    'salinity': re.compile(r'\b(salinity|salt|psu)\b'),
+    'depth': re.compile(r'\b(depth|pressure)\b'),
+    'oxygen': re.compile(r'\boxygen\b'),
+    'date': re.compile(r'\b(time|date|trend|seasonal|monthly)\b'),
+}
+MAP_COLUMNS = ('latitude', 'longitude')
+
+
+def requested_variables(message: str) -> set:
+    """Data columns a chart or map request names"""
+    text = message.lower()
+    return {col for col, pattern in REQUESTED_VARIABLES.items() if pattern.search(text)}
+
+
+def _has_values(data: pd.DataFrame, col: str) -> bool:
+    if col == 'date' and col not in data.columns:
+        col = 'deployment_epoch'
+    return col in data.columns and bool(data[col].notna().any())
+
+
+class ChatSession:
+    """Datasets resolved earlier in a conversation, reused by follow-up chart and map requests"""
+
+    __slots__ = ('region', 'datasets')
+
+    def __init__(self):
+        self.region = None
+        self.datasets = {}  # kind -> (DataFrame, LLM data lines)
+
+    def remember(self, kind: str, user_message: str, data: pd.DataFrame, ai_response: str):
+        if data is None or data.empty:
+            return
+        self.region = detect_region(user_message) or detect_region(ai_response) or self.region
+        self.datasets[kind] = (data, ai_response)
+
+    def reusable(self, kind: str, user_message: str):
+        """The cached (data, ai_response) for kind if the message is a follow-up it can answer.
+
+        A follow-up says so ("now", "same", "instead", ...), stays in the session's region
+        and only asks for variables the cached frame has; any other message is a new
+        question and takes the normal LLM/fetch path.
+        """
+        if kind not in self.datasets or not FOLLOW_UP_CUES.search(user_message.lower()):
+            return None
+        asked = detect_region(user_message)
+        if asked and asked != self.region:
+            return None
+        data, ai_response = self.datasets[kind]
+        needed = set(MAP_COLUMNS) if kind == 'map' else requested_variables(user_message)
+        if not all(_has_values(data, col) for col in needed):
+            return None
+        return data, ai_response
+
+
+session_store = LRUCache(SESSION_LIMIT, ttl=SESSION_TTL)
+
+
+def chat_session(data: dict):
+    """Session named by the body's session_id or the X-Session-Id header; None when absent"""
+    session_id = str(data.get("session_id") or request.headers.get("X-Session-Id") or "").strip()
+    if not session_id or len(session_id) > 128:
+        return None
+    session = session_store.get(session_id) or ChatSession()
+    session_store.put(session_id, session)  # Every use restarts the TTL
+    return session
+
+
+def build_graph_prompt(user_message: str) -> str:
+    return f"""You are an expert assistant specialized in Argo floats, oceanography, and marine data. You must ONLY provide answers related to Argo floats, oceans, seas, or marine science.
+
+User query: "{user_message}".
+Provide oceanographic data as CSV with exactly this header line:
+{','.join(GRAPH_DATA_COLUMNS)}
+15.2,35.1,100,40.5,-120.3,2023-01-01
+12.8,34.8,500,40.6,-120.2,2023-01-02
+Units: °C, PSU, meters, decimal degrees, YYYY-MM-DD dates.
+Provide 15-50 rows if possible. Do NOT truncate or summarize the rows.
+Do NOT provide any description or explanation, only the CSV."""
+
+
+def stream_completion(client, **kwargs):
+    """Yield the text deltas of a streamed chat completion"""
+    stream = client.chat.completions.create(stream=True, **kwargs)
+    for chunk in stream:
+        if chunk.choices and chunk.choices[0].delta.content:
+            yield chunk.choices[0].delta.content
+
+
+def summarize_data_text(data: pd.DataFrame, subject: str) -> str:
+    """Plain-text summary of parsed data, used when there is no budget left to render"""
+    if data.empty:
+        return f"No {subject} data could be retrieved in time."
+    parts = [f"{len(data)} {subject} data points"]
+    units = {'temperature': '°C', 'salinity': 'PSU', 'depth': 'm'}
+    for col, unit in units.items():
+        if col in data.columns and data[col].notna().any():
+            parts.append(f"{col} {data[col].min():.1f}-{data[col].max():.1f} {unit} (mean {data[col].mean():.1f})")
+    return "; ".join(parts) + "."
+
+
+def generate_graph_events(client, user_message: str, preview_mode=None, deadline: Deadline = None,
+                          session: ChatSession = None):
+    """Consume the graph completion as a stream and render as data arrives.
+
+    Yields at most one "preview" event once GRAPH_PREVIEW_MIN_POINTS rows have been
+    parsed (a low-resolution chart, or the parsed series when preview_mode is "data"),
+    then a "final" event when the stream ends. With a deadline, the stream is cut off
+    when the budget runs out and the final chart degrades per the budget. A follow-up
+    in a session that already holds graph data re-renders it without calling the LLM.
+    """
+    deadline = deadline or Deadline(LATENCY_BUDGETS['graph'])
+    cached = session.reusable('graph', user_message) if session else None
+    if cached:
+        yield graph_final_event(user_message, *cached, deadline, from_session=True)
+        return
+
+    extractor = IncrementalDataExtractor(GRAPH_DATA_COLUMNS)
+    previewed = False
+    completion = stream_completion(
+        client,
+        model="x-ai/grok-4-fast:free",
+        messages=[{"role": "user", "content": build_graph_prompt(user_message)}],
+        max_tokens=600,
+        temperature=0.3,
+        **deadline.llm_options()
+    )
+    for text in completion:
+        if deadline.remaining() < STREAM_CUTOFF_BELOW:
+            # Keep the rows received so far and leave time to render them
+            deadline.degrade('truncated_completion')
+            break
+        if not extractor.feed(text) or not preview_mode or previewed:
+            continue
+        if extractor.point_count >= GRAPH_PREVIEW_MIN_POINTS:
+            previewed = True
+            partial = extractor.frame()
+            event = {"event": "preview", "points": len(partial)}
+            if preview_mode == "data":
+                event["series"] = json.loads(partial.to_json(orient='records', date_format='iso'))
+            else:
+                event["graph_url"] = artifact_url(create_graph(user_message, partial, dpi=GRAPH_PREVIEW_DPI), 'png')
+            yield event
+
+    ai_response = extractor.close()
+    graph_data = extractor.frame()
+    if graph_data.empty:
+        graph_data = extract_data_from_response(ai_response, user_message, "graph", deadline)
+    if session:
+        session.remember('graph', user_message, graph_data, ai_response)
+    yield graph_final_event(user_message, graph_data, ai_response, deadline)
+
+
+def graph_final_event(user_message: str, graph_data: pd.DataFrame, ai_response: str, deadline: Deadline,
+                      from_session: bool = False) -> dict:
+    if not deadline.allow_visual():
+        return {"event": "final", "reply": summarize_data_text(graph_data, "ocean"), "has_graph": False,
+                "degradations": deadline.degradations, **data_freshness(graph_data)}
+
+    dpi = 300 if deadline.allow_full_render() else LOW_RESOLUTION_DPI
+    return {
+        "event": "final",
+        "reply": "",  # Empty reply - only show graph
+        "graph_url": artifact_url(create_graph(user_message, graph_data, ai_response, dpi=dpi), 'png'),
+        "has_graph": True,
+        "from_session": from_session,
+        "degradations": deadline.degradations,
+        **data_freshness(graph_data)
+    }
+
+
+def build_map_prompt(user_message: str) -> str:
+    return f"""You are an expert assistant specialized in Argo floats, oceanography, and marine data. You must ONLY provide answers related to Argo floats, oceans, seas, or marine science.
+
+The user asked: "{user_message}". 
+Provide ARGO float locations as CSV with exactly this header line:
+{','.join(LOCATION_DATA_COLUMNS)}
+35.5,-120.3,pacific
+Use decimal degrees and one of pacific, atlantic, indian, arctic, southern for region.
+Do NOT provide any description or explanation, only the CSV."""
+
+
+def generate_map_payload(client, user_message: str, deadline: Deadline, session: ChatSession = None) -> dict:
+    """Ask the LLM for locations, resolve the float data and render the map within the budget"""
+    # A map follow-up can also plot the positions of an earlier chart's observations
+    cached = None
+    if session:
+        cached = session.reusable('map', user_message)
+        graph = None if cached else session.reusable('graph', user_message)
+        if graph and all(_has_values(graph[0], col) for col in MAP_COLUMNS):
+            cached = graph
+    if cached:
+        location_data, ai_response = cached
+    else:
+        completion = client.chat.completions.create(
+            model="x-ai/grok-4-fast:free",
+            messages=[{"role": "user", "content": build_map_prompt(user_message)}],
+            **deadline.llm_options()
+        )
+        ai_response = completion.choices[0].message.content
+
+        # Extract location data from AI response and create map
+        location_data = extract_location_data_from_response(ai_response, user_message, deadline)
+        if session:
+            session.remember('map', user_message, location_data, ai_response)
+    if not deadline.allow_visual():
+        return {"reply": summarize_data_text(location_data, "float location"), "has_map": False,
+                "degradations": deadline.degradations, **data_freshness(location_data)}
+    
+    max_markers = None if deadline.allow_full_render() else MAP_MARKER_LIMIT
+    map_html = create_map(user_message, location_data, ai_response, max_markers=max_markers)
+    return {
+        "reply": "",  # Empty reply - only show map
+        "map_url": artifact_url(map_html, 'html'),
+        "has_map": True,
+        "from_session": bool(cached),
+        "degradations": deadline.degradations,
+        **data_freshness(location_data)
+    }
+
+
+def text_reply(client, user_message: str, deadline: Deadline = None) -> str:
+    system_message = """You are an expert assistant specialized in Argo floats, oceanography, and marine data. 
+
+For greetings and opening statements (hi, hello, how are you, what can you do, etc.), respond warmly and introduce yourself as a marine science expert, then invite the user to ask about Argo floats, oceans, seas, or marine science topics.
+
+For all other queries, you must ONLY provide answers related to Argo floats, oceans, seas, or marine science. Always focus on accurate, concise, and domain-specific responses. Do NOT generate any general or unrelated information."""
     
-    # Return the HTML directly instead of base64 encoding
-    return map_html
+    completion = client.chat.completions.create(
+        model="x-ai/grok-4-fast:free",
+        messages=[
+            {"role": "system", "content": system_message},
+            {"role": "user", "content": user_message}
+        ],
+        max_tokens=200,  # Limit response length for speed
+        temperature=0.5,  # Balanced creativity and speed
+        **(deadline.llm_options() if deadline else {})
+    )
+    return completion.choices[0].message.content
+
+
+def _ndjson_graph_stream(client, user_message: str, preview_mode, deadline: Deadline, session: ChatSession = None):
+    """Serialize graph events as newline-delimited JSON, falling back to text on failure"""
+    try:
+        for event in generate_graph_events(client, user_message, preview_mode, deadline, session):
+            yield json.dumps(event) + "\n"
+    except Exception as graph_error:
+        print(f"Graph generation error: {graph_error}")
+        try:
+            reply = text_reply(client, user_message, deadline)
+            yield json.dumps({"event": "final", "reply": reply, "has_graph": False,
+                              "degradations": deadline.degradations}) + "\n"
+        except Exception as e:
+            yield json.dumps({"event": "error", "error": "Server error: " + str(e)}) + "\n"
+
+
+# Canonical queries (the welcome message's suggestions by default) answered from precomputed responses
+CANNED_QUERIES = [query.strip() for query in os.environ.get(
+    "ARGO_CANNED_QUERIES",
+    "Show me a graph of temperature vs depth|Where are the ARGO floats located?|Plot salinity distribution over time"
+).split('|') if query.strip()]
+
+
+def normalize_query(message: str) -> str:
+    return ' '.join(re.findall(r'[a-z0-9]+', message.lower()))
+
+
+class CannedResponses:
+    """Full /chat responses for the canonical queries, rebuilt when the snapshots they use refresh.
+
+    Chart and map answers are rendered from the global snapshots rather than the LLM;
+    text answers are generated once. Lookups are a dict access on the normalized message.
+    """
+
+    def __init__(self, queries):
+        self.queries = queries
+        self._responses = {}  # normalized query -> (payload, snapshot or None)
+        self._lock = threading.Lock()
+        self._dirty = set()
+        self._pid = None
+        self.stats = {'hits': 0, 'builds': 0, 'last_build_seconds': None, 'last_error': None}
+
+    @staticmethod
+    def _kind(query: str):
+        return 'locations' if is_map_query(query) else 'observations' if is_graph_query(query) else None
+
+    def lookup(self, message: str):
+        """(payload, data frame or None) for a canned query, or None"""
+        entry = self._responses.get(normalize_query(message))
+        if entry is None:
+            return None
+        self.stats['hits'] += 1
+        payload, snapshot = entry
+        if snapshot is None:
+            return dict(payload), None
+        frame = _snapshot_frame(snapshot)
+        urls = {key: public_url(value) for key, value in payload.items()
+                if key.endswith('_url') and not value.startswith('http')}
+        return {**payload, **urls, **data_freshness(frame)}, frame
+
+    def _build(self, query: str):
+        kind = self._kind(query)
+        if kind is None:
+            return {"reply": text_reply(create_client(), query), "has_graph": False, "canned": True}, None
+        snapshot = get_snapshot(kind)
+        if snapshot is None:
+            raise RuntimeError(f"no {kind} snapshot available")
+        return self._render(query, kind, snapshot)
+
+    @staticmethod
+    def _render(query: str, kind: str, snapshot: Snapshot):
+        if kind == 'locations':
+            payload = {"reply": "", "map_url": artifact_url(create_map(query, snapshot.frame), 'html'), "has_map": True}
+        else:
+            payload = {"reply": "", "graph_url": artifact_url(create_graph(query, snapshot.frame), 'png'), "has_graph": True}
+        return {**payload, "canned": True, "degradations": []}, snapshot
+
+    def rebuild(self, kinds=None):
+        """Rebuild the answers that depend on `kinds` (and any still missing); coalesces overlapping calls"""
+        self._dirty.update(('locations', 'observations', None) if kinds is None else kinds)
+        while self._dirty:
+            if not self._lock.acquire(blocking=False):
+                return  # The running build picks up the new kinds
+            try:
+                while self._dirty:
+                    kinds, self._dirty = self._dirty, set()
+                    self._rebuild_kinds(kinds)
+            finally:
+                self._lock.release()
+
+    def _rebuild_kinds(self, kinds):
+        started = time.perf_counter()
+        responses = dict(self._responses)
+        for query in self.queries:
+            key = normalize_query(query)
+            if key in responses and self._kind(query) not in kinds:
+                continue
+            try:
+                responses[key] = self._build(query)
+            except Exception as e:
+                self.stats['last_error'] = f"{query}: {e}"
+                print(f"Canned response for {query!r} failed: {e}")
+        self._responses = responses
+        self.stats['builds'] += 1
+        self.stats['last_build_seconds'] = round(time.perf_counter() - started, 3)
+
+    def _stale_kinds(self) -> set:
+        """Kinds with an answer missing or rendered from a snapshot that has since been replaced"""
+        stale = set()
+        for query in self.queries:
+            kind = self._kind(query)
+            entry = self._responses.get(normalize_query(query))
+            if entry is None or (kind is not None and entry[1] is not snapshot_store.get(kind, None)):
+                stale.add(kind)
+        return stale
+
+    def prebuild(self):
+        """Render the chart and map answers from snapshots already in memory, without
+        fetching or starting threads; lets a pre-fork warm-up hand them to every worker"""
+        for query in self.queries:
+            kind = self._kind(query)
+            snapshot = snapshot_store.get(kind, None) if kind else None
+            if snapshot is None:
+                continue
+            try:
+                self._responses[normalize_query(query)] = self._render(query, kind, snapshot)
+            except Exception as e:
+                self.stats['last_error'] = f"{query}: {e}"
+                print(f"Canned response for {query!r} failed: {e}")
+
+    def start(self):
+        """Build what is missing or stale in the background, once per process; later
+        snapshot refreshes trigger rebuilds"""
+        if self._pid == os.getpid():
+            return
+        self._pid = os.getpid()
+        threading.Thread(target=self.rebuild, args=(self._stale_kinds(),), name="canned-responses",
+                         daemon=True).start()
+
+    def after_fork(self):
+        """A build running in the parent at fork time would leave its lock held here"""
+        self._lock = threading.Lock()
+        self._dirty = set()
+
+    def on_refresh(self, kind, region, df):
+        if region is None and self._pid == os.getpid():
+            threading.Thread(target=self.rebuild, args=({kind},), daemon=True).start()
+
+    def metrics(self) -> dict:
+        return {'queries': len(self.queries), 'ready': len(self._responses), **self.stats}
+
+
+canned_responses = CannedResponses(CANNED_QUERIES)
+on_snapshot_refresh(canned_responses.on_refresh)
+
+
+_EMPTY_TILE = None
+
+
+@app.get("/tiles/<snapshot_id>/<int:z>/<int:x>/<int:y>.png")
+def density_tile(snapshot_id, z, x, y):
+    global _EMPTY_TILE
+    path = os.path.join(snapshot_id, str(z), str(x), f"{y}.png")
+    if snapshot_id.isalnum() and os.path.isfile(os.path.join(TILE_DIR, path)):
+        return send_from_directory(TILE_DIR, path, mimetype="image/png", max_age=31536000)
+    # Tiles without floats are not written; answer with a transparent tile
+    if _EMPTY_TILE is None:
+        buffer = io.BytesIO()
+        plt.imsave(buffer, np.zeros((TILE_SIZE, TILE_SIZE, 4), dtype='uint8'), format='png')
+        _EMPTY_TILE = buffer.getvalue()
+    response = Response(_EMPTY_TILE, mimetype="image/png")
+    response.cache_control.public = True
+    response.cache_control.max_age = 31536000
+    return response
+
+
+@app.get("/artifacts/<name>")
+def artifact(name):
+    data = artifact_store.get(name) if _ARTIFACT_NAME.match(name) else None
+    if data is None:
+        return jsonify({"error": "artifact not found"}), 404
+    response = Response(data, mimetype=ARTIFACT_TYPES[name.rsplit('.', 1)[1]])
+    response.set_etag(name.split('.')[0])
+    response.cache_control.public = True
+    response.cache_control.max_age = 31536000
+    response.cache_control.immutable = True
+    return response.make_conditional(request, accept_ranges=True, complete_length=len(data))
+
+
+def start_background_jobs():
+    """Start this worker's snapshot refresher and canned-response builds (once per process)"""
+    snapshot_refresher.start()
+    canned_responses.start()
+
+
+@app.get("/metrics")
+def metrics():
+    return jsonify({
+        "startup": STARTUP_METRICS,
+        "snapshots": snapshot_refresher.metrics(),
+        "data_source": data_source.metrics(),
+        "erddap_circuit": erddap_breaker.metrics(),
+        "admission": admission.metrics(),
+        "artifacts": artifact_store.metrics(),
+        "canned": canned_responses.metrics(),
+        "sessions": len(session_store),
+        "tiles": _tile_state
+    })
+
+
+# Opt-in request profiling: a matching X-Argo-Profile token or random sampling, one request at a time
+PROFILE_TOKEN = os.environ.get("ARGO_PROFILE_TOKEN", "")
+PROFILE_SAMPLE_RATE = float(os.environ.get("ARGO_PROFILE_SAMPLE_RATE", "0"))
+PROFILE_KEEP = int(os.environ.get("ARGO_PROFILE_KEEP", "20"))
+_profiles = deque(maxlen=PROFILE_KEEP)
+_profiler_lock = threading.Lock()
+_profile_stats = {'profiled': 0, 'skipped_busy': 0}
+
+
+def _debug_authorized() -> bool:
+    """Debug endpoints need the profile token in the X-Argo-Profile header; without one they are off"""
+    supplied = request.headers.get("X-Argo-Profile") or ""
+    return bool(PROFILE_TOKEN) and hmac.compare_digest(supplied, PROFILE_TOKEN)
+
+
+@app.before_request
+def _start_profiling():
+    if request.endpoint != 'chat':
+        return
+    requested = request.headers.get("X-Argo-Profile")
+    if requested:
+        if not _debug_authorized():
+            return
+    elif not (PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE):
+        return
+    if not _profiler_lock.acquire(blocking=False):
+        _profile_stats['skipped_busy'] += 1
+        return
+    g.profile = {'id': uuid.uuid4().hex[:12], 'started': time.perf_counter(), 'profiler': cProfile.Profile(),
+                 'trigger': 'header' if requested else 'sample'}
+    g.profile['profiler'].enable()
+
+
+@app.after_request
+def _finish_profiling(response):
+    profile = g.pop('profile', None)
+    if profile is None:
+        return response
+    response.headers["X-Argo-Profile-Id"] = profile['id']
+    body = request.get_json(silent=True) or {}
+
+    def finish():
+        # Runs after the body has been sent, so streamed responses are profiled to the end
+        profile['profiler'].disable()
+        _profiler_lock.release()
+        profile['profiler'].create_stats()
+        _profiles.append({
+            'id': profile['id'],
+            'at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'trigger': profile['trigger'],
+            'message': str(body.get("message", ""))[:120],
+            'status': response.status_code,
+            'seconds': round(time.perf_counter() - profile['started'], 3),
+            'stats': marshal.dumps(profile['profiler'].stats),
+        })
+        _profile_stats['profiled'] += 1
+
+    response.call_on_close(finish)
+    return response
+
+
+@app.teardown_request
+def _abort_profiling(exc):
+    # after_request never ran (the request failed before a response was finalized), so drop the profile
+    profile = g.pop('profile', None)
+    if profile is not None:
+        profile['profiler'].disable()
+        _profiler_lock.release()
+
+
+def _find_profile(profile_id: str):
+    return next((entry for entry in _profiles if entry['id'] == profile_id), None)
+
+
+@app.get("/debug/profiles")
+def list_profiles():
+    if not _debug_authorized():
+        return jsonify({"error": "forbidden"}), 403
+    return jsonify({**_profile_stats, 'sample_rate': PROFILE_SAMPLE_RATE,
+                    'profiles': [{k: v for k, v in entry.items() if k != 'stats'} for entry in reversed(_profiles)]})
+
+
+@app.get("/debug/profiles/<profile_id>")
+def show_profile(profile_id):
+    """Text report (?sort=cumulative|tottime|calls, ?limit=40), or the raw pstats file with ?format=pstats"""
+    if not _debug_authorized():
+        return jsonify({"error": "forbidden"}), 403
+    entry = _find_profile(profile_id)
+    if entry is None:
+        return jsonify({"error": "profile not found"}), 404
+    if request.args.get("format") == "pstats":
+        response = Response(entry['stats'], mimetype="application/octet-stream")
+        response.headers["Content-Disposition"] = f"attachment; filename=argo-{profile_id}.pstats"
+        return response
+
+    stats = pstats.Stats(_MarshalledStats(entry['stats']), stream=io.StringIO())
+    sort = request.args.get("sort", "cumulative")
+    stats.sort_stats(sort if sort in ('cumulative', 'tottime', 'calls', 'ncalls') else 'cumulative')
+    stats.print_stats(min(int(request.args.get("limit", "40")), 500))
+    header = f"{entry['message']!r} -> {entry['status']} in {entry['seconds']}s ({entry['trigger']}, {entry['at']})\n"
+    return Response(header + stats.stream.getvalue(), mimetype="text/plain")
+
+
+class _MarshalledStats:
+    """Adapter so pstats.Stats can load stats kept in memory"""
+
+    def __init__(self, data: bytes):
+        self.stats = marshal.loads(data)
+
+    def create_stats(self):
+        pass
+
+
+# Memory accounting; ARGO_TRACEMALLOC_FRAMES > 0 traces allocations (with that stack depth) from startup
+TRACEMALLOC_FRAMES = int(os.environ.get("ARGO_TRACEMALLOC_FRAMES", "0"))
+if TRACEMALLOC_FRAMES > 0:
+    tracemalloc.start(TRACEMALLOC_FRAMES)
+_tracemalloc_baseline = None
+
+
+def approx_nbytes(obj) -> int:
+    """Bytes held by cached values: frames, arrays, buffers and containers of them"""
+    if isinstance(obj, pd.DataFrame):
+        return int(obj.memory_usage(index=True, deep=False).sum())
+    if isinstance(obj, (np.ndarray, pd.Series)):
+        return int(obj.nbytes)
+    if isinstance(obj, (bytes, str)):
+        return len(obj)
+    if isinstance(obj, ChatSession):
+        return approx_nbytes(obj.datasets)
+    if isinstance(obj, dict):
+        return sum(approx_nbytes(value) for value in obj.values())
+    if isinstance(obj, (list, tuple)):
+        return sum(approx_nbytes(value) for value in obj)
+    return 0
+
+
+def _process_memory() -> dict:
+    memory = {}
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith(('VmRSS:', 'VmHWM:')):
+                    memory['rss_bytes' if line.startswith('VmRSS') else 'peak_rss_bytes'] = int(line.split()[1]) * 1024
+    except OSError:
+        import resource
+        memory['peak_rss_bytes'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    return memory
+
+
+def _tracemalloc_report(limit: int, reset_baseline: bool) -> dict:
+    """Top allocation sites and growth since the previous report (or the last reset)"""
+    global _tracemalloc_baseline
+    if not tracemalloc.is_tracing():
+        return {'tracing': False}
+    current, peak = tracemalloc.get_traced_memory()
+    snapshot = tracemalloc.take_snapshot().filter_traces([
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    ])
+    report = {
+        'tracing': True,
+        'current_bytes': current,
+        'peak_bytes': peak,
+        'top': [{'site': str(stat.traceback), 'bytes': stat.size, 'blocks': stat.count}
+                for stat in snapshot.statistics('lineno')[:limit]],
+    }
+    if _tracemalloc_baseline is not None:
+        report['growth'] = [{'site': str(stat.traceback), 'bytes': stat.size_diff, 'blocks': stat.count_diff}
+                            for stat in snapshot.compare_to(_tracemalloc_baseline, 'lineno')[:limit]]
+    if reset_baseline or _tracemalloc_baseline is None:
+        _tracemalloc_baseline = snapshot
+    return report
+
+
+@app.get("/debug/memory")
+def debug_memory():
+    """Per-worker memory: process RSS, open figures, cache and snapshot bytes, tracemalloc sites.
+
+    ?limit=N sets how many allocation sites are listed; ?reset=1 makes this report
+    the baseline the next report's growth is measured against.
+    """
+    if not _debug_authorized():
+        return jsonify({"error": "forbidden"}), 403
+    caches = {
+        'profile_summary': _profile_summary_cache,
+        'grid': _grid_cache,
+        'sessions': session_store,
+    }
+    return jsonify({
+        'pid': os.getpid(),
+        'process': _process_memory(),
+        'figures': {'open': len(plt.get_fignums()) if plt._module is not None else 0, **_figure_stats},
+        'caches': {name: {'items': len(cache), 'bytes': approx_nbytes(cache.values())}
+                   for name, cache in caches.items()},
+        'artifacts_hot_bytes': artifact_store.metrics()['hot_bytes'],
+        'snapshots': {f"{kind}/{region or 'global'}": {'rows': len(snapshot.frame),
+                                                       'bytes': approx_nbytes(snapshot.frame)}
+                      for (kind, region), snapshot in snapshot_store.items()},
+        'tracemalloc': _tracemalloc_report(min(int(request.args.get("limit", "15")), 100),
+                                           request.args.get("reset") == "1"),
+    })
+
+
+# Admission control: per-intent concurrency limits, bounded queues and fair-share weights
+ADMISSION_CLASSES = {
+    'text': {'concurrency': int(os.environ.get("ARGO_TEXT_CONCURRENCY", "8")),
+             'queue': int(os.environ.get("ARGO_TEXT_QUEUE", "32")), 'weight': 4},
+    'graph': {'concurrency': int(os.environ.get("ARGO_GRAPH_CONCURRENCY", "3")),
+              'queue': int(os.environ.get("ARGO_GRAPH_QUEUE", "8")), 'weight': 2},
+    'map': {'concurrency': int(os.environ.get("ARGO_MAP_CONCURRENCY", "2")),
+            'queue': int(os.environ.get("ARGO_MAP_QUEUE", "6")), 'weight': 1},
+}
+ADMISSION_TOTAL_SLOTS = int(os.environ.get("ARGO_MAX_CONCURRENT", "8"))
+ADMISSION_MAX_WAIT = float(os.environ.get("ARGO_ADMISSION_MAX_WAIT_SECONDS", "5"))
+
+
+class AdmissionRejected(Exception):
+    """The request can't be admitted; carries the HTTP status and Retry-After seconds"""
+
+    def __init__(self, status: int, retry_after: int, reason: str):
+        super().__init__(reason)
+        self.status = status
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """Bounded per-class queues and concurrency limits with weighted fair scheduling.
+
+    A request runs once a shared slot and a slot of its class are free. When a slot
+    frees up and several classes are waiting, the class with the smallest virtual time
+    goes next; each admission advances its class's virtual time by 1/weight, so cheap
+    text replies keep flowing during a burst of map renders. A full queue is rejected
+    immediately (429) and a request that waits too long gets a 503, both with a
+    Retry-After estimated from recent service times.
+    """
+
+    def __init__(self, classes: dict, total_slots: int):
+        self.classes = classes
+        self.total_slots = total_slots
+        self._cond = threading.Condition()
+        self._running = {name: 0 for name in classes}
+        self._waiting = {name: [] for name in classes}
+        self._vtime = {name: 0.0 for name in classes}
+        self._clock = 0.0
+        self._service_seconds = {name: 1.0 for name in classes}
+        self._stats = {name: {'admitted': 0, 'rejected_queue_full': 0, 'rejected_timeout': 0} for name in classes}
+
+    def _retry_after(self, name: str) -> int:
+        limit = self.classes[name]['concurrency']
+        backlog = len(self._waiting[name]) + self._running[name]
+        return max(1, int(np.ceil(self._service_seconds[name] * backlog / limit)))
+
+    def _next_class(self):
+        ready = [name for name, queue in self._waiting.items()
+                 if queue and self._running[name] < self.classes[name]['concurrency']]
+        return min(ready, key=lambda name: self._vtime[name]) if ready else None
+
+    def acquire(self, name: str, timeout: float):
+        with self._cond:
+            queue = self._waiting[name]
+            if len(queue) >= self.classes[name]['queue']:
+                self._stats[name]['rejected_queue_full'] += 1
+                raise AdmissionRejected(429, self._retry_after(name), f"{name} queue is full")
+            if not queue:
+                # A class that was idle doesn't bank credit for the time it wasn't competing
+                self._vtime[name] = max(self._vtime[name], self._clock)
+            ticket = object()
+            queue.append(ticket)
+            expires = time.monotonic() + timeout
+            try:
+                while not (queue[0] is ticket and sum(self._running.values()) < self.total_slots
+                           and self._next_class() == name):
+                    remaining = expires - time.monotonic()
+                    if remaining <= 0:
+                        self._stats[name]['rejected_timeout'] += 1
+                        raise AdmissionRejected(503, self._retry_after(name), f"timed out waiting for a {name} slot")
+                    self._cond.wait(remaining)
+            finally:
+                queue.remove(ticket)
+                self._cond.notify_all()
+            self._running[name] += 1
+            self._clock = self._vtime[name]
+            self._vtime[name] += 1.0 / self.classes[name]['weight']
+            self._stats[name]['admitted'] += 1
+        return time.monotonic()
+
+    def release(self, name: str, started: float):
+        with self._cond:
+            self._running[name] -= 1
+            elapsed = time.monotonic() - started
+            self._service_seconds[name] = 0.8 * self._service_seconds[name] + 0.2 * elapsed
+            self._cond.notify_all()
+
+    def metrics(self) -> dict:
+        with self._cond:
+            return {name: {'running': self._running[name], 'waiting': len(self._waiting[name]),
+                           'avg_service_seconds': round(self._service_seconds[name], 3), **self._stats[name]}
+                    for name in self.classes}
+
+
+admission = AdmissionController(ADMISSION_CLASSES, ADMISSION_TOTAL_SLOTS)
 
 
 @app.post("/chat")
 def chat():
+    data = request.get_json(silent=True) or {}
+    user_message = (data.get("message") or "").strip()
+    if not user_message:
+        return jsonify({"error": "message is required"}), 400
+
+    # Check if the query is domain-related
+    if not is_domain_related(user_message):
+        return jsonify({
+            "reply": "Sorry, I can only provide information related to Argo floats, oceans, seas, and marine science.",
+            "has_graph": False,
+            "has_map": False
+        })
+
+    # Canonical queries are answered from precomputed responses without admission or upstream calls
+    canned = canned_responses.lookup(user_message)
+    if canned is not None:
+        payload, frame = canned
+        session = chat_session(data)
+        if session and frame is not None:
+            session.remember('map' if payload.get('has_map') else 'graph', user_message, frame, "")
+        if data.get("stream") and payload.get("has_graph"):
+            return Response(json.dumps({"event": "final", **payload}) + "\n", mimetype="application/x-ndjson")
+        return jsonify(payload)
+
+    # One latency budget covers every stage of the request, including the admission wait
+    intent = 'map' if is_map_query(user_message) else 'graph' if is_graph_query(user_message) else 'text'
+    deadline = Deadline(LATENCY_BUDGETS[intent])
+    try:
+        started = admission.acquire(intent, timeout=min(ADMISSION_MAX_WAIT, deadline.remaining()))
+    except AdmissionRejected as e:
+        response = jsonify({"error": f"Server busy: {e}", "retry_after": e.retry_after})
+        response.status_code = e.status
+        response.headers["Retry-After"] = str(e.retry_after)
+        return response
+
     try:
-        data = request.get_json(silent=True) or {}
-        user_message = (data.get("message") or "").strip()
-        if not user_message:
-            return jsonify({"error": "message is required"}), 400
-
-        # Check if the query is domain-related
-        if not is_domain_related(user_message):
-            return jsonify({
-                "reply": "Sorry, I can only provide information related to Argo floats, oceans, seas, and marine science.",
-                "has_graph": False,
-                "has_map": False
-            })
+        response = make_response(answer_chat(data, user_message, intent, deadline))
+    except BaseException:
+        admission.release(intent, started)
+        raise
+    # Streamed responses hold their slot until the last event has been sent
+    response.call_on_close(lambda: admission.release(intent, started))
+    return response
+
 
+def answer_chat(data: dict, user_message: str, intent: str, deadline: Deadline):
+    session = chat_session(data)
+    try:
         # Check if this is a map query
-        if is_map_query(user_message):
+        if intent == 'map' and deadline.allow_visual():
             try:
-                # First get AI response to extract location data
                 client = create_client()
-                map_prompt = f"""You are an expert assistant specialized in Argo floats, oceanography, and marine data. You must ONLY provide answers related to Argo floats, oceans, seas, or marine science.
-
-The user asked: "{user_message}". 
-Provide ARGO float locations with specific coordinates. 
-Include exact latitude and longitude coordinates (e.g., "latitude: 35.5, longitude: -120.3"), 
-mention specific ocean regions (Pacific, Atlantic, Indian, Arctic, Southern). 
-Do NOT provide any description or explanation, only the location data."""
-                
-                completion = client.chat.completions.create(
-                    model="x-ai/grok-4-fast:free",
-                    messages=[{"role": "user", "content": map_prompt}],
-                )
-                ai_response = completion.choices[0].message.content
-                
-                # Extract location data from AI response and create map
-                location_data = extract_location_data_from_response(ai_response, user_message)
-                map_html = create_map(user_message, location_data, ai_response)
-                
-                return jsonify({
-                    "reply": "",  # Empty reply - only show map
-                    "map": map_html,
-                    "has_map": True
-                })
+                return jsonify(generate_map_payload(client, user_message, deadline, session))
             except Exception as map_error:
                 # If map generation fails, fall back to regular AI response
                 print(f"Map generation error: {map_error}")
                 pass
 
         # Check if this is a graph query
-        if is_graph_query(user_message):
+        if is_graph_query(user_message) and deadline.allow_visual():
+            # "stream": true (or "chart") sends a preliminary chart, "data" sends the parsed series
+            preview_mode = data.get("stream")
+            if preview_mode is True:
+                preview_mode = "chart"
             try:
-                # First get AI response to extract meaningful data - OPTIMIZED FOR SPEED
                 client = create_client()
-                graph_prompt = f"""You are an expert assistant specialized in Argo floats, oceanography, and marine data. You must ONLY provide answers related to Argo floats, oceans, seas, or marine science.
-
-User query: "{user_message}".
-Provide oceanographic data with specific values in a flat, readable list.
-Use this style so it's easy to parse:
-Temperature: 15.2°C at 100m depth, Salinity: 35.1 PSU, Latitude: 40.5, Longitude: -120.3, Date: 2023-01-01
-Temperature: 12.8°C at 500m depth, Salinity: 34.8 PSU, Latitude: 40.6, Longitude: -120.2, Date: 2023-01-02
-Provide 15-50 lines if possible. Do NOT truncate or summarize the data lines.
-Do NOT provide any description or explanation, only the data list."""
+                if preview_mode:
+                    return Response(
+                        stream_with_context(_ndjson_graph_stream(client, user_message, preview_mode, deadline, session)),
+                        mimetype="application/x-ndjson"
+                    )
                 
-                completion = client.chat.completions.create(
-                    model="x-ai/grok-4-fast:free",
-                    messages=[{"role": "user", "content": graph_prompt}],
-                    max_tokens=600,
-                    temperature=0.3
-                )
-                ai_response = completion.choices[0].message.content
-                
-                # Extract data from AI response and create graph
-                sample_data = extract_data_from_response(ai_response, user_message, "graph")
-                graph_image = create_graph(user_message, sample_data, ai_response)
-                
-                return jsonify({
-                    "reply": "",  # Empty reply - only show graph
-                    "graph": graph_image,
-                    "has_graph": True
-                })
+                # Parsing overlaps generation; only the final event is returned
+                final = None
+                for event in generate_graph_events(client, user_message, deadline=deadline, session=session):
+                    final = event
+                final.pop("event")
+                return jsonify(final)
             except Exception as graph_error:
                 # If graph generation fails, fall back to regular AI response
                 print(f"Graph generation error: {graph_error}")
                 pass
 
         # Regular AI response (no graph) - OPTIMIZED FOR SPEED
+        if deadline.expired:
+            return jsonify({"error": "Request exceeded its latency budget",
+                            "degradations": deadline.degradations}), 504
         client = create_client()
-        system_message = """You are an expert assistant specialized in Argo floats, oceanography, and marine data. 
-
-For greetings and opening statements (hi, hello, how are you, what can you do, etc.), respond warmly and introduce yourself as a marine science expert, then invite the user to ask about Argo floats, oceans, seas, or marine science topics.
-
-For all other queries, you must ONLY provide answers related to Argo floats, oceans, seas, or marine science. Always focus on accurate, concise, and domain-specific responses. Do NOT generate any general or unrelated information."""
-        
-        completion = client.chat.completions.create(
-            model="x-ai/grok-4-fast:free",
-            messages=[
-                {"role": "system", "content": system_message},
-                {"role": "user", "content": user_message}
-            ],
-            max_tokens=200,  # Limit response length for speed
-            temperature=0.5  # Balanced creativity and speed
-        )
-        content = completion.choices[0].message.content
-        return jsonify({"reply": content, "has_graph": False})
+        content = text_reply(client, user_message, deadline)
+        return jsonify({"reply": content, "has_graph": False, "degradations": deadline.degradations})
         
     except RuntimeError as e:
         # Handle missing API key
@@ -1189,6 +3923,56 @@ For all other queries, you must ONLY provide answers related to Argo floats, oce
         return jsonify({"error": "Server error: " + error_msg}), 500
 
 
+# Whether this process runs the background jobs, or hands them to the workers it forks
+_background_jobs = False
+
+
+def _after_fork_in_child():
+    """Background threads don't survive a fork, but the locks they held at that moment do"""
+    global _snapshot_write_lock, _tile_build_lock
+    _snapshot_write_lock = threading.Lock()
+    _tile_build_lock = threading.Lock()
+    snapshot_refresher.after_fork()
+    canned_responses.after_fork()
+    if _background_jobs:
+        start_background_jobs()  # A worker forked from a --preload master
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
+
+_restore_started = time.perf_counter()
+STARTUP_METRICS['restored_snapshots'] = restore_snapshots(snapshot_store, notify=False)
+STARTUP_METRICS['restore_seconds'] = round(time.perf_counter() - _restore_started, 4)
+
+STARTUP_METRICS['import_seconds'] = round(time.perf_counter() - _IMPORT_STARTED, 4)
+print(f"Backend imported in {STARTUP_METRICS['import_seconds']}s")
+
+if os.environ.get("ARGO_WARMUP", "").lower() in ("1", "true", "yes"):
+    warm_up()  # Pre-fork master: the forked workers start the background jobs
+    _background_jobs = True
+elif __name__ != "__main__":
+    # Imported by the server in the worker itself, so start before the first request
+    _background_jobs = True
+    start_background_jobs()
+
+
 if __name__ == "__main__":
+    import sys
+    if sys.argv[1:2] == ["build-zarr"]:
+        # python main.py build-zarr [path]: consolidate the local GDAC mirror into a Zarr store
+        gdac = GdacDataSource(os.environ.get("ARGO_GDAC_ROOT", "gdac"))
+        build_zarr_store(gdac.monthly_batches(), sys.argv[2] if len(sys.argv) > 2 else
+                         os.environ.get("ARGO_ZARR_PATH", "argo.zarr"))
+        sys.exit(0)
+    if sys.argv[1:2] == ["build-synthetic-zarr"]:
+        # python main.py build-synthetic-zarr <path> [floats] [cycles]: a reproducible benchmark store
+        n_floats = int(sys.argv[3]) if len(sys.argv) > 3 else 4000
+        cycles = int(sys.argv[4]) if len(sys.argv) > 4 else 36
+        build_zarr_store(synthetic_fleet_batches(n_floats, cycles=cycles), sys.argv[2])
+        sys.exit(0)
+
     port = int(os.environ.get("PORT", "5000"))
+    if os.environ.get("WERKZEUG_RUN_MAIN") == "true":
+        start_background_jobs()  # In the reloader's serving process, not the file watcher
     app.run(host="0.0.0.0", port=port, debug=True) 
\ No newline at end of file
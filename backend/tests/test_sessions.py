@@ -0,0 +1,48 @@
+import os
+import sys
+
+# No background refresh, persisted snapshots or canned builds while testing
+os.environ.setdefault("ARGO_REFRESH_INTERVAL", "0")
+os.environ.setdefault("ARGO_SNAPSHOT_DIR", "")
+os.environ.setdefault("ARGO_CANNED_QUERIES", "")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd  # noqa: E402
+
+import main  # noqa: E402
+
+
+def graph_session():
+    session = main.ChatSession()
+    data = pd.DataFrame({
+        'temperature': [24.1, 18.3, 9.7],
+        'salinity': [35.1, 35.0, 34.8],
+        'depth': [5.0, 100.0, 500.0],
+        'latitude': [10.0, 10.0, 10.0],
+        'longitude': [-150.0, -150.0, -150.0],
+    })
+    session.remember('graph', "Show me temperature vs depth in the Pacific", data, "temperature,depth")
+    return session, data
+
+
+def test_follow_up_reuses_cached_data():
+    session, data = graph_session()
+    cached = session.reusable('graph', "now salinity vs depth")
+    assert cached is not None and cached[0] is data
+
+
+def test_fresh_question_is_not_answered_from_cache():
+    session, _ = graph_session()
+    assert session.reusable('graph', "plot temperature over time") is None
+    assert session.reusable('graph', "Show me a graph of salinity vs depth") is None
+
+
+def test_follow_up_needs_the_requested_variables():
+    session, _ = graph_session()
+    assert session.reusable('graph', "now plot oxygen vs depth") is None
+    assert session.reusable('graph', "same but over time") is None
+
+
+def test_follow_up_in_another_region_is_fetched_again():
+    session, _ = graph_session()
+    assert session.reusable('graph', "now salinity vs depth in the Atlantic") is None
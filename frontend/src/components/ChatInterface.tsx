@@ -13,11 +13,17 @@ interface Message {
   sender: "user" | "ai";
   timestamp: Date;
   hasGraph?: boolean;
-  graphImage?: string;
+  graphUrl?: string;
   hasMap?: boolean;
-  mapHtml?: string;
+  mapUrl?: string;
 }
 
+// crypto.randomUUID only exists in secure contexts (HTTPS or localhost)
+const newSessionId = () =>
+  typeof crypto !== "undefined" && typeof crypto.randomUUID === "function"
+    ? crypto.randomUUID()
+    : `${Date.now().toString(36)}-${Math.random().toString(36).slice(2)}`;
+
 export const ChatInterface = () => {
   const [messages, setMessages] = useState<Message[]>([
     {
@@ -29,16 +35,18 @@ export const ChatInterface = () => {
   ]);
   const [inputValue, setInputValue] = useState("");
   const [isLoading, setIsLoading] = useState(false);
-  const [fullscreenMap, setFullscreenMap] = useState<{ isOpen: boolean; mapHtml?: string }>({
+  // Lets follow-up questions re-use the data the backend resolved earlier in this chat
+  const [sessionId] = useState(newSessionId);
+  const [fullscreenMap, setFullscreenMap] = useState<{ isOpen: boolean; mapUrl?: string }>({
     isOpen: false,
-    mapHtml: undefined
+    mapUrl: undefined
   });
 
   // Handle ESC key to close fullscreen
   useEffect(() => {
     const handleKeyDown = (event: KeyboardEvent) => {
       if (event.key === 'Escape' && fullscreenMap.isOpen) {
-        setFullscreenMap({ isOpen: false, mapHtml: undefined });
+        setFullscreenMap({ isOpen: false, mapUrl: undefined });
       }
     };
 
@@ -75,7 +83,7 @@ export const ChatInterface = () => {
       const res = await fetch(import.meta.env.VITE_BACKEND_URL ?? "http://localhost:5000/chat", {
         method: "POST",
         headers: { "Content-Type": "application/json" },
-        body: JSON.stringify({ message: userMessage.content })
+        body: JSON.stringify({ message: userMessage.content, session_id: sessionId })
       });
       const data = await res.json();
       const reply = data?.reply ?? data?.error ?? "Sorry, something went wrong.";
@@ -85,9 +93,9 @@ export const ChatInterface = () => {
         sender: "ai",
         timestamp: new Date(),
         hasGraph: data?.has_graph || false,
-        graphImage: data?.graph || undefined,
+        graphUrl: data?.graph_url || undefined,
         hasMap: data?.has_map || false,
-        mapHtml: data?.map || undefined
+        mapUrl: data?.map_url || undefined
       };
       setMessages(prev => [...prev, aiResponse]);
     } catch (err) {
@@ -150,28 +158,27 @@ export const ChatInterface = () => {
                               <ReactMarkdown remarkPlugins={[remarkGfm]}>
                                 {message.content}
                               </ReactMarkdown>
-                              {message.hasGraph && message.graphImage && (
+                              {message.hasGraph && message.graphUrl && (
                                 <div className="mt-4">
                                   <img 
-                                    src={`data:image/png;base64,${message.graphImage}`}
+                                    src={message.graphUrl}
                                     alt="Generated graph"
                                     className="max-w-full h-auto rounded-lg border border-border shadow-sm"
                                   />
                                 </div>
                               )}
-                              {message.hasMap && message.mapHtml && (
+                              {message.hasMap && message.mapUrl && (
                                 <div className="mt-4 relative">
-                                  <div 
+                                  <iframe
+                                    src={message.mapUrl}
+                                    title="ARGO float map"
                                     className="w-full h-96 rounded-lg border border-border shadow-sm overflow-hidden"
-                                    dangerouslySetInnerHTML={{ 
-                                      __html: message.mapHtml 
-                                    }}
                                   />
                                   <Button
                                     variant="outline"
                                     size="sm"
                                     className="absolute top-2 right-2 bg-white/95 hover:bg-white shadow-lg border-2 hover:border-blue-300 transition-all duration-200"
-                                    onClick={() => setFullscreenMap({ isOpen: true, mapHtml: message.mapHtml })}
+                                    onClick={() => setFullscreenMap({ isOpen: true, mapUrl: message.mapUrl })}
                                     title="Open map in fullscreen"
                                   >
                                     <Maximize2 className="w-4 h-4 mr-1" />
@@ -231,7 +238,7 @@ export const ChatInterface = () => {
       </div>
 
       {/* Fullscreen Map Modal */}
-      {fullscreenMap.isOpen && fullscreenMap.mapHtml && (
+      {fullscreenMap.isOpen && fullscreenMap.mapUrl && (
         <div className="fixed inset-0 z-50 bg-black/80 flex items-center justify-center p-4">
           <div className="bg-white rounded-lg shadow-2xl w-full h-full max-w-7xl max-h-[95vh] flex flex-col">
             {/* Modal Header */}
@@ -240,7 +247,7 @@ export const ChatInterface = () => {
               <Button
                 variant="ghost"
                 size="sm"
-                onClick={() => setFullscreenMap({ isOpen: false, mapHtml: undefined })}
+                onClick={() => setFullscreenMap({ isOpen: false, mapUrl: undefined })}
                 className="hover:bg-gray-100"
               >
                 <X className="w-5 h-5" />
@@ -249,11 +256,10 @@ export const ChatInterface = () => {
             
             {/* Map Container */}
             <div className="flex-1 p-4">
-              <div 
+              <iframe
+                src={fullscreenMap.mapUrl}
+                title="ARGO float map (fullscreen)"
                 className="w-full h-full rounded-lg border border-border shadow-sm overflow-hidden"
-                dangerouslySetInnerHTML={{ 
-                  __html: fullscreenMap.mapHtml 
-                }}
               />
             </div>
             
@@ -265,7 +271,7 @@ export const ChatInterface = () => {
                 </p>
                 <Button
                   variant="outline"
-                  onClick={() => setFullscreenMap({ isOpen: false, mapHtml: undefined })}
+                  onClick={() => setFullscreenMap({ isOpen: false, mapUrl: undefined })}
                 >
                   Close Fullscreen
                 </Button>